@@ -0,0 +1,13 @@
+"""
+Paket scraping data sekolah Dapodik.
+
+- dapodik.utils  : request (pool, rate limit, AIMD, retry, cache), parsing, CSV
+- dapodik.runner : crawl banyak wilayah target dalam satu proses
+- dapodik.journal: jurnal status crawl (SQLite) untuk resume
+- dapodik.sinks  : output bertipe (Parquet / Arrow IPC) dan SQLite upsert
+- dapodik.workqueue: antrean kerja multi-node (coordinator, worker, lease)
+- dapodik.planner  : ukuran crawl per kecamatan, ETA, urutan & budget run
+- dapodik.logs     : logging terstruktur (JSON lines, handler antrean, sampling, progres)
+
+Jalankan `python -m dapodik crawl --config targets.toml` dari root repo.
+"""
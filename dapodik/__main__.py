@@ -0,0 +1,139 @@
+import argparse
+import os
+import sys
+
+from .logs import LOG_FORMAT, LOG_FORMATS, LOG_LEVEL, setup_logging
+from .planner import PLAN_ORDER, PLAN_ORDERS, build_plan
+from .runner import ENGINE, INCREMENTAL, MAX_WORKERS, OUTPUTS, SEMESTERS, Crawler, Target, load_config, run
+from .utils import PROJECTION, PROJECTIONS
+from .sinks import SINKS, csv_to_columnar
+from .workqueue import QUEUE_FILE, QUEUE_PORT, Worker, coordinate, open_queue
+
+# secret bersama coordinator & worker bisa juga diberikan lewat environment
+QUEUE_SECRET_ENV = 'DAPODIK_QUEUE_SECRET'
+
+
+def add_target_arguments(command: argparse.ArgumentParser) -> None:
+    command.add_argument('--config', help="file target (.toml, .yaml/.yml, .json)")
+    command.add_argument('--target', action='append', default=[], metavar='PROVINSI/KOTA[=CSV]',
+                         help="tambahkan target lewat CLI (boleh diulang)")
+    command.add_argument('--output', action='append', choices=['csv', *SINKS],
+                         help=f"output (boleh diulang, default: {', '.join(OUTPUTS)}); csv/sqlite pertama jadi output utama")
+    command.add_argument('--incremental', action='store_true', default=None,
+                         help="hanya ambil ulang sekolah yang baru / berubah menurut fingerprint listing")
+    command.add_argument('--semester', action='append', metavar='SEMESTER[,SEMESTER...]',
+                         help=f"semester yang di-crawl (boleh diulang, default: {', '.join(SEMESTERS)}); "
+                              "lebih dari satu -> output per semester")
+    command.add_argument('--columns', action='append', metavar='KOLOM[,KOLOM...]',
+                         help="kolom output saja (boleh diulang; 'listing' = semua kolom dari listing); "
+                              "hanya endpoint detail yang mengisi kolom itu yang diminta")
+    command.add_argument('--projection', choices=PROJECTIONS,
+                         help=f"kolom yang tidak diminta: empty = dikosongkan, omit = tidak ditulis (default: {PROJECTION})")
+    command.add_argument('--order', choices=PLAN_ORDERS,
+                         help=f"urutan kecamatan (default: {PLAN_ORDER}); largest = terbesar dulu")
+    command.add_argument('--max-requests', type=int, help="budget request run ini; sisa kecamatan ditunda")
+    command.add_argument('--max-minutes', type=float, help="budget waktu run ini (menit); sisa sekolah ditunda")
+
+
+def add_logging_arguments(command: argparse.ArgumentParser) -> None:
+    command.add_argument('--log-level', default=LOG_LEVEL, choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                         type=str.upper, help=f"default: {LOG_LEVEL}; DEBUG menampilkan setiap request")
+    command.add_argument('--log-format', default=LOG_FORMAT, choices=LOG_FORMATS,
+                         help=f"format log di stderr (default: {LOG_FORMAT}); json = satu objek JSON per baris")
+    command.add_argument('--log-file', help="tulis juga log JSON lines ke file ini")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m dapodik', description="Scraping data sekolah Dapodik")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    crawl = commands.add_parser('crawl', help="crawl semua wilayah target dalam satu run")
+    add_target_arguments(crawl)
+    crawl.add_argument('--engine', choices=['thread', 'async'], help=f"default: {ENGINE}")
+    crawl.add_argument('--max-workers', type=int, help=f"default: {MAX_WORKERS}")
+    crawl.add_argument('--retry-failed', action='store_true',
+                       help="proses ulang hanya sekolah yang tercatat di dead-letter file")
+
+    plan = commands.add_parser('plan', help="hitung jumlah sekolah, request & ETA tanpa meng-crawl")
+    add_target_arguments(plan)
+    plan.add_argument('--detail', action='store_true', help="tampilkan rincian per kecamatan")
+
+    coordinator = commands.add_parser('coordinator', help="bagi crawl ke worker lewat antrean kerja")
+    add_target_arguments(coordinator)
+    coordinator.add_argument('--queue', default=QUEUE_FILE, help=f"file antrean SQLite (default: {QUEUE_FILE})")
+    coordinator.add_argument('--listen', metavar='[HOST]:PORT',
+                             help=f"buka server antrean untuk worker di mesin lain (mis. :{QUEUE_PORT})")
+    coordinator.add_argument('--secret', help=f"secret bersama worker (default: ${QUEUE_SECRET_ENV})")
+
+    worker = commands.add_parser('worker', help="kerjakan item dari antrean coordinator")
+    worker.add_argument('--connect', metavar='HOST:PORT', help="alamat server antrean coordinator")
+    worker.add_argument('--queue', default=QUEUE_FILE, help="file antrean SQLite lokal (tanpa --connect)")
+    worker.add_argument('--max-workers', type=int, default=MAX_WORKERS, help=f"default: {MAX_WORKERS}")
+    worker.add_argument('--name', help="nama worker (default: hostname-pid)")
+    worker.add_argument('--secret', help=f"secret antrean (default: ${QUEUE_SECRET_ENV})")
+
+    export = commands.add_parser('export', help="konversi CSV hasil crawl ke dataset kolomnar bertipe")
+    export.add_argument('csv', nargs='+', help="file CSV hasil crawl")
+    export.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+
+    for command in commands.choices.values():
+        add_logging_arguments(command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    setup_logging(args.log_level, args.log_format, args.log_file)
+
+    if args.command == 'export':
+        for csv_filename in args.csv:
+            csv_to_columnar(csv_filename, format=args.format)
+        return 0
+
+    if args.command == 'worker':
+        queue = open_queue(args.connect, args.queue, secret=args.secret or os.environ.get(QUEUE_SECRET_ENV))
+        Worker(queue, name=args.name, max_workers=args.max_workers).run()
+        return 0
+
+    config = load_config(args.config) if args.config else {}
+    targets = config.get('target', []) + [Target.parse(spec) for spec in args.target]
+    if not targets:
+        print("Tidak ada target. Gunakan --config FILE atau --target PROVINSI/KOTA.")
+        return 2
+
+    options = dict(
+        outputs=args.output or config.get('outputs', OUTPUTS),
+        incremental=args.incremental or config.get('incremental', INCREMENTAL),
+        semesters=args.semester or config.get('semesters', SEMESTERS),
+        columns=args.columns or config.get('columns'),
+        projection=args.projection or config.get('projection', PROJECTION),
+        order=args.order or config.get('order', PLAN_ORDER),
+        max_requests=args.max_requests or config.get('max_requests'),
+        max_minutes=args.max_minutes or config.get('max_minutes'))
+
+    if args.command == 'plan':
+        crawler = Crawler(targets, **options)
+        plan = build_plan(crawler, crawler.order, crawler.max_requests, crawler.max_seconds)
+        plan.print_summary(detail=args.detail)
+        if plan.deferred:
+            print(f"❌ Tidak semua kecamatan muat dalam budget ({len(plan.items)} dari {len(plan.items) + len(plan.deferred)}).")
+            return 1
+        if crawler.max_requests or crawler.max_seconds:
+            print("✅ Semua kecamatan muat dalam budget.")
+        return 0
+
+    if args.command == 'coordinator':
+        coordinate(targets, queue_path=args.queue, listen=args.listen,
+                   secret=args.secret or os.environ.get(QUEUE_SECRET_ENV), **options)
+        return 0
+
+    run(targets,
+        engine=args.engine or config.get('engine', ENGINE),
+        max_workers=args.max_workers or config.get('max_workers', MAX_WORKERS),
+        retry_failed=args.retry_failed,
+        **options)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,335 @@
+import os
+import csv
+import copy
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+
+# ==========================================================
+# JURNAL CRAWL (SQLITE, WAL)
+# ==========================================================
+# Status setiap sekolah yang pernah masuk daftar crawl:
+#   pending  -> sudah di-listing, belum dikerjakan
+#   inflight -> sedang dikerjakan (attempts bertambah per percobaan)
+#   done     -> barisnya sudah di-fsync ke output
+#   failed   -> menyerah setelah batas percobaan (juga ada di dead-letter file)
+# Resume cukup lookup ber-indeks, tidak perlu membaca ulang seluruh CSV.
+# Untuk crawl inkremental, jurnal juga menyimpan fingerprint baris listing
+# dan baris output terakhir tiap sekolah, beserta kolom yang benar-benar
+# terisi (run --columns), supaya run berikutnya yang butuh kolom lain
+# mengambil ulang sekolah itu.
+from .utils import SEMESTER_ID, CSV_HEADERS, align_csv_row, read_csv_header
+
+JOURNAL_FILE = os.path.join('result', 'crawl_journal.db')
+
+log = logging.getLogger(__name__)
+
+# Field listing yang berubah tanpa perubahan data sekolah (progres/waktu
+# sinkronisasi), tidak ikut dihitung di fingerprint.
+FINGERPRINT_IGNORE = {'sinkron_terakhir', 'tanggal_sinkron', 'tgl_sinkron', 'jam_sinkron', 'last_sync', 'persen_sinkron'}
+
+STATUSES = ('pending', 'inflight', 'done', 'failed')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sekolah (
+    sekolah_id_enkrip TEXT NOT NULL,
+    semester_id       TEXT NOT NULL,
+    output            TEXT NOT NULL,
+    status            TEXT NOT NULL DEFAULT 'pending',
+    attempts          INTEGER NOT NULL DEFAULT 0,
+    nama              TEXT,
+    provinsi          TEXT,
+    kota              TEXT,
+    kecamatan         TEXT,
+    sekolah_json      TEXT,
+    error             TEXT,
+    fingerprint       TEXT,
+    row_json          TEXT,
+    row_columns       TEXT,
+    updated_at        REAL NOT NULL,
+    PRIMARY KEY (sekolah_id_enkrip, semester_id)
+);
+CREATE INDEX IF NOT EXISTS idx_sekolah_status ON sekolah (output, semester_id, status);
+CREATE INDEX IF NOT EXISTS idx_sekolah_id ON sekolah (sekolah_id_enkrip, updated_at);
+CREATE TABLE IF NOT EXISTS imported_output (
+    output      TEXT NOT NULL,
+    semester_id TEXT NOT NULL,
+    imported_at REAL NOT NULL,
+    PRIMARY KEY (output, semester_id)
+);
+"""
+
+
+class CrawlJournal:
+    """
+    Jurnal status crawl per (sekolah_id_enkrip, semester_id) di SQLite (WAL).
+    Satu koneksi dipakai bersama semua thread, dijaga lock.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE, semester_id: str = SEMESTER_ID):
+        self.path = path
+        self.semester_id = semester_id
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+
+    def _migrate(self):
+        # jurnal lama (sebelum crawl inkremental / --columns) belum punya kolom fingerprint/row_json/row_columns
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sekolah)")}
+        if columns:
+            for column in ('fingerprint', 'row_json', 'row_columns'):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE sekolah ADD COLUMN {column} TEXT")
+
+    def for_semester(self, semester_id: str) -> 'CrawlJournal':
+        """Jurnal yang sama (koneksi & lock dipakai bersama) dengan semester lain."""
+        if semester_id == self.semester_id:
+            return self
+        view = copy.copy(self)
+        view.semester_id = semester_id
+        return view
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    # --- startup ---
+    def recover(self) -> int:
+        """Sekolah yang masih 'inflight' dari run yang crash dikembalikan ke 'pending'."""
+        cur = self._execute(
+            "UPDATE sekolah SET status = 'pending', updated_at = ? WHERE status = 'inflight' AND semester_id = ?",
+            (time.time(), self.semester_id))
+        if cur.rowcount:
+            log.info("[JOURNAL] %d sekolah inflight dari run sebelumnya dikembalikan ke pending.", cur.rowcount)
+        return cur.rowcount
+
+    def import_output(self, output: str) -> int:
+        """
+        Sekali per file output: baris yang sudah ada di CSV lama dicatat 'done'
+        (beserta isinya), supaya hasil crawl sebelum ada jurnal tidak diambil ulang.
+        Hanya untuk output yang belum pernah dicatat jurnal di semester mana pun;
+        setelah itu isi CSV dianggap milik semester saat impor.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM imported_output WHERE output = ? "
+                "UNION ALL SELECT 1 FROM sekolah WHERE output = ? LIMIT 1",
+                (output, output)).fetchone()
+        if row:
+            return 0
+
+        rows = load_output_rows(output)
+        # CSV proyeksi 'omit' hanya memuat kolom di header-nya
+        header = read_csv_header(output)
+        row_columns = encode_columns([column for column in header if column in CSV_HEADERS] if header else None)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO sekolah (sekolah_id_enkrip, semester_id, output, status, nama, provinsi, kota, kecamatan, row_json, row_columns, updated_at) "
+                    "VALUES (?, ?, ?, 'done', ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (sekolah_id_enkrip, semester_id) DO UPDATE SET "
+                    "status = 'done', row_json = excluded.row_json, row_columns = excluded.row_columns, "
+                    "updated_at = excluded.updated_at",
+                    [(row[0].strip(), self.semester_id, output, *row[1:5], json.dumps(row, ensure_ascii=False),
+                      row_columns, now) for row in rows])
+                self._conn.execute(
+                    "INSERT INTO imported_output (output, semester_id, imported_at) VALUES (?, ?, ?)",
+                    (output, self.semester_id, now))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+        log.info("[JOURNAL] %d ID dari %s diimpor ke jurnal.", len(rows), output)
+        return len(rows)
+
+    # --- lookup ---
+    def status(self, sekolah_id_enkrip: str):
+        row = self._execute(
+            "SELECT status FROM sekolah WHERE sekolah_id_enkrip = ? AND semester_id = ?",
+            (sekolah_id_enkrip, self.semester_id)).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, sekolah_id_enkrip: str) -> bool:
+        return self.status(sekolah_id_enkrip) == 'done'
+
+    def moved(self, sekolah_id_enkrip: str, output: str, columns=None) -> bool:
+        """
+        Sudah 'done' di semester ini tapi barisnya ditulis ke output lain (mis.
+        run sebelumnya satu semester ke data_Depok.csv, sekarang dipecah ke
+        data_Depok_20251.csv): baris tersimpan perlu disalin ke output baru.
+        False jika baris tersimpan tidak memuat semua `columns` (diambil ulang).
+        """
+        row = self._execute(
+            "SELECT output, row_json, row_columns FROM sekolah "
+            "WHERE sekolah_id_enkrip = ? AND semester_id = ? AND status = 'done'",
+            (sekolah_id_enkrip, self.semester_id)).fetchone()
+        return row is not None and row[0] != output and row[1] is not None and covers(row[2], columns)
+
+    def counts(self, output: str = None) -> dict:
+        sql = "SELECT status, COUNT(*) FROM sekolah WHERE semester_id = ?"
+        params = [self.semester_id]
+        if output:
+            sql += " AND output = ?"
+            params.append(output)
+        rows = self._execute(sql + " GROUP BY status", params).fetchall()
+        return {status: dict(rows).get(status, 0) for status in STATUSES}
+
+    def previous(self, sekolah_id_enkrip: str):
+        """
+        Catatan terakhir sekolah ini yang sudah 'done' (semester ini atau
+        sebelumnya): dict semester_id, fingerprint, row (list CSV atau None),
+        columns (kolom yang terisi di row, None = semua).
+        """
+        row = self._execute(
+            "SELECT semester_id, fingerprint, row_json, row_columns FROM sekolah "
+            "WHERE sekolah_id_enkrip = ? AND status = 'done' "
+            "ORDER BY semester_id = ? DESC, updated_at DESC LIMIT 1",
+            (sekolah_id_enkrip, self.semester_id)).fetchone()
+        if row is None:
+            return None
+        semester_id, fingerprint, row_json, row_columns = row
+        return {'semester_id': semester_id, 'fingerprint': fingerprint,
+                'row': json.loads(row_json) if row_json else None,
+                'columns': json.loads(row_columns) if row_columns else None}
+
+    def set_fingerprint(self, sekolah_id_enkrip: str, fingerprint: str):
+        """Catat fingerprint listing untuk sekolah yang sudah 'done' tanpa fingerprint (baseline)."""
+        self._execute(
+            "UPDATE sekolah SET fingerprint = ? WHERE sekolah_id_enkrip = ? AND semester_id = ?",
+            (fingerprint, sekolah_id_enkrip, self.semester_id))
+
+    def unfinished(self, output: str) -> list:
+        """Sekolah 'pending' milik output ini: (sekolah, provinsi, kota, kecamatan)."""
+        rows = self._execute(
+            "SELECT sekolah_json, provinsi, kota, kecamatan FROM sekolah "
+            "WHERE output = ? AND semester_id = ? AND status = 'pending' AND sekolah_json IS NOT NULL",
+            (output, self.semester_id)).fetchall()
+        return [(json.loads(sekolah_json), provinsi, kota, kecamatan)
+                for sekolah_json, provinsi, kota, kecamatan in rows]
+
+    def done_by_kecamatan(self, output: str) -> dict:
+        """Jumlah sekolah 'done' per nama kecamatan untuk output ini (dipakai planner)."""
+        rows = self._execute(
+            "SELECT kecamatan, COUNT(*) FROM sekolah WHERE output = ? AND semester_id = ? AND status = 'done' "
+            "GROUP BY kecamatan", (output, self.semester_id)).fetchall()
+        return dict(rows)
+
+    # --- transisi status ---
+    def enqueue(self, output: str, sekolah: dict, provinsi: str, kota: str, kecamatan: str,
+                fingerprint: str = None, reopen: bool = False, columns=None) -> bool:
+        """
+        Catat sekolah hasil listing sebagai 'pending' (status lain tidak diubah,
+        kecuali 'failed' yang dibuka lagi, atau semua status jika `reopen`).
+        Sekolah 'done' yang barisnya tidak memuat semua `columns` (mis. hasil
+        run --columns listing) juga dibuka lagi. True jika sekolah perlu dikerjakan.
+        """
+        sid = sekolah['sekolah_id_enkrip'].strip()
+        with self._lock:
+            if not reopen:
+                current = self._conn.execute(
+                    "SELECT status, row_columns FROM sekolah WHERE sekolah_id_enkrip = ? AND semester_id = ?",
+                    (sid, self.semester_id)).fetchone()
+                reopen = current is not None and current[0] == 'done' and not covers(current[1], columns)
+            self._conn.execute(
+                "INSERT INTO sekolah (sekolah_id_enkrip, semester_id, output, status, nama, provinsi, kota, kecamatan, sekolah_json, fingerprint, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (sekolah_id_enkrip, semester_id) DO UPDATE SET "
+                "status = CASE WHEN status = 'failed' OR ? THEN 'pending' ELSE status END, "
+                "output = CASE WHEN status = 'done' AND NOT ? THEN output ELSE excluded.output END, "
+                "nama = excluded.nama, provinsi = excluded.provinsi, kota = excluded.kota, "
+                "kecamatan = excluded.kecamatan, sekolah_json = excluded.sekolah_json, "
+                "fingerprint = COALESCE(excluded.fingerprint, fingerprint)",
+                (sid, self.semester_id, output, sekolah['nama'], provinsi, kota, kecamatan,
+                 json.dumps(sekolah, ensure_ascii=False), fingerprint, time.time(), reopen, reopen))
+            row = self._conn.execute(
+                "SELECT status FROM sekolah WHERE sekolah_id_enkrip = ? AND semester_id = ?",
+                (sid, self.semester_id)).fetchone()
+        return row[0] != 'done'
+
+    def start(self, sekolah_id_enkrip: str):
+        """Satu percobaan dimulai: status 'inflight', attempts + 1."""
+        self._execute(
+            "UPDATE sekolah SET status = 'inflight', attempts = attempts + 1, updated_at = ? "
+            "WHERE sekolah_id_enkrip = ? AND semester_id = ?",
+            (time.time(), sekolah_id_enkrip, self.semester_id))
+
+    def mark_done(self, output: str, rows, columns=None):
+        """
+        Dipanggil dengan baris-baris output (list CSV) setelah benar-benar
+        di-commit (lihat CsvWriter.on_commit). Isi baris disimpan untuk
+        crawl inkremental berikutnya, beserta `columns` yang terisi (None = semua).
+        """
+        row_columns = encode_columns(columns)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO sekolah (sekolah_id_enkrip, semester_id, output, status, row_json, row_columns, updated_at) "
+                    "VALUES (?, ?, ?, 'done', ?, ?, ?) "
+                    "ON CONFLICT (sekolah_id_enkrip, semester_id) DO UPDATE SET "
+                    "status = 'done', output = excluded.output, error = NULL, row_json = excluded.row_json, "
+                    "row_columns = excluded.row_columns, updated_at = excluded.updated_at",
+                    [(row[0], self.semester_id, output, json.dumps(row, ensure_ascii=False), row_columns, now)
+                     for row in rows])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+
+    def mark_failed(self, sekolah_id_enkrip: str, error: str):
+        self._execute(
+            "UPDATE sekolah SET status = 'failed', error = ?, updated_at = ? "
+            "WHERE sekolah_id_enkrip = ? AND semester_id = ?",
+            (error, time.time(), sekolah_id_enkrip, self.semester_id))
+
+
+def encode_columns(columns):
+    """Kolom baris untuk kolom row_columns jurnal: None jika semua CSV_HEADERS."""
+    if columns is None or set(CSV_HEADERS) <= set(columns):
+        return None
+    return json.dumps([column for column in CSV_HEADERS if column in columns], ensure_ascii=False)
+
+
+def covers(row_columns, columns) -> bool:
+    """Baris dengan `row_columns` (json / list, None = semua) memuat semua `columns` (None = semua)?"""
+    if row_columns is None:
+        return True
+    if isinstance(row_columns, str):
+        row_columns = json.loads(row_columns)
+    return set(CSV_HEADERS if columns is None else columns) <= set(row_columns)
+
+
+def listing_fingerprint(sekolah: dict) -> str:
+    """sha1 dari baris listing (key terurut, tanpa FINGERPRINT_IGNORE)."""
+    data = {key: value for key, value in sekolah.items() if key not in FINGERPRINT_IGNORE}
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def load_output_rows(filename: str) -> list:
+    """Baris CSV output (urutan CSV_HEADERS, lihat align_csv_row)."""
+    rows = []
+    if not os.path.exists(filename):
+        return rows
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        for values in reader:
+            if values and values[0].strip():
+                rows.append(align_csv_row(values, header))
+    return rows
@@ -0,0 +1,213 @@
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+from collections import Counter
+
+# ==========================================================
+# LOGGING TERSTRUKTUR (JSON LINES, HANDLER ANTREAN, SAMPLING)
+# ==========================================================
+# Semua modul menulis lewat logger 'dapodik.*' (argumen %-style, jadi
+# pesan hanya diformat jika levelnya aktif). Thread crawl hanya
+# memasukkan record ke antrean (QueueHandler); satu thread QueueListener
+# yang memformat dan menulis ke terminal / file, jadi worker tidak pernah
+# berebut stdout. Event yang berulang per request / sekolah disampling
+# (LOG_SAMPLE) dan baris progres ringkas dicatat berkala (Progress).
+# Field tambahan lewat `extra=` (event, url, sekolah_id, ...) ikut ditulis
+# di format json.
+
+# =========================
+# KONFIGURASI
+# =========================
+LOG_LEVEL = 'INFO'        # DEBUG menampilkan setiap request & percobaan sekolah
+LOG_FORMAT = 'text'       # 'text' (pesan saja, seperti output lama) atau 'json' (satu objek JSON per baris)
+LOG_FORMATS = ('text', 'json')
+LOG_FILE = None           # file log tambahan (selalu json lines), None -> hanya stderr
+LOG_SAMPLE = {            # event -> hanya 1 dari N record yang ditulis; ERROR ke atas tidak disampling
+    'request': 100,
+    'retry': 10,
+    'school_attempt': 100,
+    'school_saved': 50,
+    'school_skipped': 100,
+    'queue_item': 100,
+}
+PROGRESS_INTERVAL = 10.0  # detik antar baris [PROGRESS]
+
+log = logging.getLogger('dapodik.progress')
+
+# atribut bawaan LogRecord; sisanya berasal dari `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Satu objek JSON per baris: ts, level, logger, msg + field `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        data.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Loloskan 1 dari N record per event (`rates`, lihat LOG_SAMPLE). Record
+    yang lolos membawa `sample_rate` = N supaya jumlah aslinya bisa dihitung
+    ulang dari log. ERROR ke atas selalu lolos.
+    """
+
+    def __init__(self, rates: dict = None):
+        super().__init__()
+        self.rates = dict(LOG_SAMPLE if rates is None else rates)
+        self.seen = Counter()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, 'event', None)
+        rate = self.rates.get(event, 1)
+        if rate <= 1 or record.levelno >= logging.ERROR:
+            return True
+        with self._lock:
+            seen = self.seen[event]
+            self.seen[event] = seen + 1
+        if seen % rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def setup_logging(level: str = LOG_LEVEL, format: str = LOG_FORMAT, file: str = LOG_FILE,
+                  sample: dict = None, stream=None) -> logging.Logger:
+    """
+    Pasang QueueHandler (+ SamplingFilter) pada logger 'dapodik' dan satu
+    QueueListener yang menulis ke `stream` (default stderr) dan `file`.
+    Boleh dipanggil ulang; konfigurasi sebelumnya diganti.
+    """
+    global _listener
+    if format not in LOG_FORMATS:
+        raise ValueError(f"Format log '{format}' tidak dikenal (pilihan: {', '.join(LOG_FORMATS)})")
+    stop_logging()
+    console = logging.StreamHandler(stream or sys.stderr)
+    console.setFormatter(JsonFormatter() if format == 'json' else logging.Formatter('%(message)s'))
+    handlers = [console]
+    if file:
+        file_handler = logging.FileHandler(file, encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(SamplingFilter(sample))
+    logger = logging.getLogger('dapodik')
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(queue_handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    with _listener_lock:
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+    return logger
+
+
+def ensure_logging() -> None:
+    """setup_logging() dengan default jika belum dikonfigurasi (skrip lama yang langsung memanggil run())."""
+    if _listener is None:
+        setup_logging()
+
+
+@atexit.register
+def stop_logging() -> None:
+    """Tulis sisa record di antrean lalu hentikan thread listener."""
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        # record sesudah ini (mis. atexit lain) jatuh ke logging.lastResort, tidak hilang di antrean
+        logger = logging.getLogger('dapodik')
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                logger.removeHandler(handler)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}j {minutes:02d}m"
+    return f"{minutes}m {seconds:02d}d"
+
+
+class Progress:
+    """
+    Penghitung event crawl (done, failed, queued, ...) dan satu baris
+    [PROGRESS] ringkas setiap `interval` detik dari thread daemon, plus satu
+    baris terakhir saat stop(). Di format json penghitungnya ikut sebagai field.
+    """
+
+    def __init__(self, label: str = 'crawl', interval: float = PROGRESS_INTERVAL):
+        self.label = label
+        self.interval = interval
+        self.counts = Counter()
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.counts[key] += n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def report(self) -> None:
+        counts = self.snapshot()
+        elapsed = time.monotonic() - self.started
+        done = counts.get('done', 0)
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = max(counts.get('queued', 0) - done - counts.get('failed', 0), 0)
+        eta = format_duration(remaining / rate) if rate and remaining else '-'
+        summary = ', '.join(f"{counts[key]} {key}" for key in sorted(counts)) or 'belum ada'
+        log.info("[PROGRESS] %s: %s | %.1f/s | sisa %d | ETA %s | %s", self.label, summary, rate, remaining, eta,
+                 format_duration(elapsed),
+                 extra={'event': 'progress', 'label': self.label, 'counts': counts, 'rate': round(rate, 2),
+                        'remaining': remaining, 'elapsed': round(elapsed, 1)})
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def start(self) -> 'Progress':
+        self.started = time.monotonic()
+        self._stop.clear()
+        if self.interval and self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name=f"progress:{self.label}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.report()
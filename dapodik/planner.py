@@ -0,0 +1,210 @@
+import time
+import logging
+
+# ==========================================================
+# PLANNER CRAWL (UKURAN, URUTAN & BUDGET)
+# ==========================================================
+# Sebelum crawl dimulai, jumlah sekolah per kecamatan diambil dari baris
+# dataSekolah level kota/kab (sudah tersimpan di RegionIndex, jadi tanpa
+# request tambahan) dan dikurangi sekolah yang sudah 'done' di jurnal.
+# Dari situ dihitung total request, perkiraan waktu (ETA) menurut rate
+# limiter, urutan kecamatan, dan kecamatan mana yang muat dalam budget.
+# Setiap kecamatan = 1 request progresSP; setiap sekolah = 1 request per
+# endpoint detail yang dibutuhkan kolom output (profil, rekap sekolahDetail;
+# tidak ada jika semua kolom tersedia di listing).
+from .utils import DETAIL_SOURCES, RATE_LIMITER, build_api_url, school_url
+from .logs import format_duration
+
+log = logging.getLogger(__name__)
+
+PLAN_ORDERS = ('largest', 'interleave', 'natural')
+PLAN_ORDER = 'largest'  # kecamatan terbesar dulu: ekor run tidak menunggu kecamatan besar yang mulai terlambat
+
+# URL contoh untuk menghitung beban tiap bucket rate limiter
+_LISTING_URL = build_api_url(level_wilayah=3, kode_wilayah='000000')
+_DETAIL_URLS = {'profil': school_url('contoh'), 'sekolahDetail': build_api_url(sekolah_id='contoh')}
+
+
+def school_count(target, kecamatan: dict):
+    """
+    Perkiraan jumlah sekolah target di kecamatan dari kolom dataSekolah
+    (`sd`, `smp`, ...; `sd_n` / `sd_s` jika hanya Negeri atau Swasta).
+    Mengembalikan (jumlah, lengkap); lengkap False jika ada jenjang yang
+    tidak punya kolom (dihitung 0), None jika indeks belum menyimpan jumlah.
+    """
+    counts = kecamatan.get('jumlah_sekolah')
+    if counts is None:
+        return None
+    total, complete = 0, True
+    both = {'Negeri', 'Swasta'} <= set(target.jenis)
+    for jenjang in target.jenjang:
+        key = jenjang.lower().replace(' ', '_')
+        if both and key in counts:
+            total += counts[key]
+            continue
+        parts = [counts.get(f"{key}_{jenis[0].lower()}") for jenis in target.jenis]
+        if None in parts:
+            complete = False
+            continue
+        total += sum(parts)
+    return total, complete
+
+
+class PlanItem:
+    """Satu kecamatan satu target: perkiraan sekolah tersisa dan request-nya."""
+
+    def __init__(self, target, province: dict, kota: dict, kecamatan: dict, schools: int, done: int, complete: bool,
+                 sources=DETAIL_SOURCES):
+        self.target = target
+        self.province = province
+        self.kota = kota
+        self.kecamatan = kecamatan
+        self.schools = schools
+        self.done = done
+        self.complete = complete
+        self.sources = tuple(sources)
+
+    @property
+    def remaining(self) -> int:
+        return max(self.schools - self.done, 0)
+
+    @property
+    def requests(self) -> int:
+        return 1 + self.remaining * len(self.sources)
+
+    @property
+    def unit(self) -> tuple:
+        return self.target, self.province, self.kota, self.kecamatan
+
+
+class CrawlPlan:
+    """
+    Daftar PlanItem terurut beserta total beban dan ETA. `deferred` berisi
+    kecamatan yang tidak muat dalam budget (dikerjakan di run berikutnya).
+    """
+
+    def __init__(self, items, order: str = PLAN_ORDER, max_requests: int = None, max_seconds: float = None,
+                 sources=DETAIL_SOURCES):
+        if order not in PLAN_ORDERS:
+            raise ValueError(f"Urutan plan '{order}' tidak dikenal (pilihan: {', '.join(PLAN_ORDERS)})")
+        self.order = order
+        self.max_requests = max_requests
+        self.max_seconds = max_seconds
+        self.sources = tuple(sources)
+        self.items, self.deferred = self.apply_budget(order_items(items, order))
+
+    def drain_seconds(self, kecamatan: int, schools: int) -> float:
+        counts = {_LISTING_URL: kecamatan}
+        counts.update({_DETAIL_URLS[source]: schools for source in self.sources})
+        return RATE_LIMITER.drain_seconds(counts)
+
+    def eta_seconds(self, items) -> float:
+        items = list(items)
+        return self.drain_seconds(len(items), sum(item.remaining for item in items))
+
+    def apply_budget(self, items):
+        """Ambil kecamatan sesuai urutan selama total request & ETA masih dalam budget."""
+        selected, deferred = [], []
+        requests = schools = 0
+        for item in items:
+            fits = not deferred
+            if fits and self.max_requests is not None and requests + item.requests > self.max_requests:
+                fits = False
+            if fits and self.max_seconds is not None:
+                fits = self.drain_seconds(len(selected) + 1, schools + item.remaining) <= self.max_seconds
+            if fits:
+                selected.append(item)
+                requests += item.requests
+                schools += item.remaining
+            else:
+                deferred.append(item)
+        return selected, deferred
+
+    @property
+    def schools(self) -> int:
+        return sum(item.remaining for item in self.items)
+
+    @property
+    def requests(self) -> int:
+        return sum(item.requests for item in self.items)
+
+    @property
+    def eta(self) -> float:
+        return self.eta_seconds(self.items)
+
+    @property
+    def complete(self) -> bool:
+        return all(item.complete for item in self.items + self.deferred)
+
+    def units(self):
+        return [item.unit for item in self.items]
+
+    def print_summary(self, detail: bool = False):
+        log.info("[PLAN] urutan: %s, per sekolah: %s", self.order, ' + '.join(self.sources) or 'listing saja')
+        if detail:
+            for item in self.items:
+                note = '' if item.complete else ' (perkiraan)'
+                log.info("[PLAN]   %s / %s [%s]: %d sekolah tersisa dari %d%s", item.target.kota, item.kecamatan['nama'],
+                         item.target.semester_id, item.remaining, item.schools, note,
+                         extra={'event': 'plan_item', 'kota': item.target.kota, 'kecamatan': item.kecamatan['nama'],
+                                'semester_id': item.target.semester_id, 'remaining': item.remaining,
+                                'schools': item.schools, 'complete': item.complete})
+        eta = self.eta
+        log.info("[PLAN] %d kecamatan, %d sekolah, ~%d request, ETA minimal %s (batas rate limiter, tanpa cache)",
+                 len(self.items), self.schools, self.requests, format_duration(eta),
+                 extra={'event': 'plan', 'kecamatan': len(self.items), 'schools': self.schools,
+                        'requests': self.requests, 'eta_seconds': round(eta, 1), 'deferred': len(self.deferred)})
+        if self.deferred:
+            schools = sum(item.remaining for item in self.deferred)
+            log.warning("[PLAN] %d kecamatan (%d sekolah, ETA %s) tidak muat dalam budget, ditunda ke run berikutnya.",
+                        len(self.deferred), schools, format_duration(self.eta_seconds(self.deferred)))
+        if not self.complete:
+            log.info("[PLAN] Sebagian jenjang tidak punya kolom jumlah di dataSekolah; angka di atas perkiraan bawah.")
+
+
+def order_items(items, order: str) -> list:
+    """
+    largest    : kecamatan dengan sisa sekolah terbanyak dulu (mengurangi ekor run),
+    interleave : bergiliran antar target (kota/semester), masing-masing terbesar dulu,
+    natural    : urutan target & indeks wilayah.
+    """
+    items = list(items)
+    if order == 'largest':
+        return sorted(items, key=lambda item: -item.remaining)
+    if order == 'interleave':
+        groups = {}
+        for item in sorted(items, key=lambda item: -item.remaining):
+            groups.setdefault(id(item.target), []).append(item)
+        queues = list(groups.values())
+        ordered = []
+        while queues:
+            ordered.extend(queue.pop(0) for queue in queues)
+            queues = [queue for queue in queues if queue]
+        return ordered
+    return items
+
+
+def build_plan(crawler, order: str = PLAN_ORDER, max_requests: int = None, max_seconds: float = None) -> CrawlPlan:
+    """Susun CrawlPlan untuk semua target (semua semester) milik `crawler`."""
+    started = time.monotonic()
+    items = []
+    refreshed = set()
+    for target in crawler.runs:
+        resolved = crawler.resolve(target)
+        if resolved is None:
+            continue
+        province, kota = resolved
+        kecamatan_list = crawler.region_index.children(kota['kode_wilayah'])
+        if any('jumlah_sekolah' not in kecamatan for kecamatan in kecamatan_list) and kota['kode_wilayah'] not in refreshed:
+            # indeks lama belum menyimpan jumlah sekolah: ambil ulang sekali
+            refreshed.add(kota['kode_wilayah'])
+            kecamatan_list = crawler.region_index.children(kota['kode_wilayah'], refresh=True)
+        done = crawler.journal_for(target).done_by_kecamatan(target.csv)
+        for kecamatan in kecamatan_list:
+            schools, complete = school_count(target, kecamatan) or (0, False)
+            items.append(PlanItem(target, province, kota, kecamatan, schools, done.get(kecamatan['nama'], 0), complete,
+                                  crawler.detail_sources))
+    plan = CrawlPlan(items, order=order, max_requests=max_requests, max_seconds=max_seconds,
+                     sources=crawler.detail_sources)
+    log.info("[PLAN] disusun dalam %.1fs", time.monotonic() - started)
+    return plan
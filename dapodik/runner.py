@@ -0,0 +1,776 @@
+import os
+import re
+import copy
+import time
+import json
+import logging
+import threading
+import concurrent.futures
+from collections import deque
+
+# ==========================================================
+# RUNNER CRAWL: SATU PROSES UNTUK BANYAK WILAYAH TARGET
+# ==========================================================
+# Menggantikan loop kota yang dulu disalin per skrip (kotaDepok.py,
+# kotaMakassar.py, dst.). Semua target dalam satu run memakai satu
+# RegionIndex, satu pool koneksi, satu rate limiter dan satu pool worker.
+# Beberapa semester juga bisa di-crawl dalam satu run; hierarki wilayah
+# hanya di-resolve sekali dan output dipisah per semester.
+from .utils import (
+    SEMESTER_ID,
+    CSV_HEADERS,
+    PROJECTION,
+    PROJECTIONS,
+    RegionIndex,
+    request_api,
+    school_url,
+    create_csv_header,
+    ASYNC_CONCURRENCY,
+    CONCURRENCY,
+    RETRY_POLICY,
+    RetryExhausted,
+    fetch_school_raw,
+    school_row_from_raw,
+    run_parser,
+    build_csv_row,
+    build_listing_row,
+    select_columns,
+    detail_sources,
+    project_row,
+    get_csv_writer,
+    close_csv_writers,
+    append_dead_letter,
+    dead_letter_path,
+    load_dead_letters,
+    rewrite_dead_letters,
+    print_session_stats,
+    run_schools_async
+)
+from .journal import CrawlJournal, covers, listing_fingerprint
+from .sinks import PRIMARY_OUTPUTS, open_sink
+from .planner import PLAN_ORDER, build_plan
+from .logs import Progress, ensure_logging
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml  # opsional, hanya untuk file target .yaml/.yml
+except ImportError:
+    yaml = None
+
+# =========================
+# KONFIGURASI DEFAULT
+# =========================
+RESULT_DIR = 'result'
+DEFAULT_JENJANG = ['SD', 'SMP', 'SMA', 'SMK']
+DEFAULT_JENIS = ['Negeri', 'Swasta']
+MAX_WORKERS = 32           # Batas atas thread; jumlah request bersamaan diatur CONCURRENCY (AIMD)
+RETRY_DELAY = 10           # Jeda awal detik sebelum mencoba ulang request yang gagal
+SCHOOL_MAX_ATTEMPTS = 3    # Percobaan maksimal per sekolah sebelum masuk dead-letter file
+LISTING_PREFETCH = 4       # daftar sekolah kecamatan berikutnya yang diambil di depan selagi pool bekerja
+PENDING_PER_WORKER = 2     # sekolah antre di pool per thread; selebihnya listing berikutnya ditahan (backpressure)
+ENGINE = 'thread'          # 'thread' (ThreadPoolExecutor) atau 'async' (asyncio, butuh aiohttp)
+INCREMENTAL = False        # True: hanya sekolah baru / berubah (fingerprint listing) yang diambil ulang
+OUTPUTS = ['csv']          # 'csv', 'sqlite', 'parquet', 'arrow'; csv/sqlite pertama jadi output utama
+SEMESTERS = [SEMESTER_ID]  # semester yang di-crawl; lebih dari satu -> output per semester (lihat semester_path)
+
+log = logging.getLogger(__name__)
+
+
+# =========================
+# TARGET WILAYAH
+# =========================
+class Target:
+    """
+    Satu wilayah target: kota/kabupaten di dalam provinsi, file CSV tujuan,
+    dan filter jenjang (bentuk_pendidikan) serta status sekolah.
+    Beberapa target boleh menulis ke CSV yang sama (mis. Kota & Kab. Bekasi).
+    Path CSV boleh memuat `{semester}`, diisi saat target dipecah per semester.
+    """
+
+    def __init__(self, kota: str, provinsi: str, csv: str = None, jenjang=None, jenis=None):
+        self.kota = kota
+        self.provinsi = provinsi
+        self.csv = csv or os.path.join(RESULT_DIR, f"data_{default_csv_name(kota)}.csv")
+        self.jenjang = list(jenjang or DEFAULT_JENJANG)
+        self.jenis = list(jenis or DEFAULT_JENIS)
+        self.semester_id = SEMESTER_ID
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Target':
+        return cls(data['kota'], data['provinsi'], data.get('csv'), data.get('jenjang'), data.get('jenis'))
+
+    @classmethod
+    def parse(cls, spec: str) -> 'Target':
+        """Format CLI: 'PROVINSI/KOTA' atau 'PROVINSI/KOTA=path/ke/file.csv'."""
+        spec, _, csv = spec.partition('=')
+        provinsi, sep, kota = spec.partition('/')
+        if not sep or not provinsi.strip() or not kota.strip():
+            raise ValueError(f"Target '{spec}' tidak valid, gunakan format PROVINSI/KOTA[=CSV]")
+        return cls(kota.strip(), provinsi.strip(), csv.strip() or None)
+
+    def for_semester(self, semester_id: str, partition: bool = False) -> 'Target':
+        """Salinan target untuk satu semester, dengan output per semester jika `partition`."""
+        target = copy.copy(self)
+        target.semester_id = semester_id
+        target.csv = semester_path(self.csv, semester_id, partition)
+        return target
+
+    @property
+    def dead_letter_file(self) -> str:
+        return dead_letter_path(self.csv)
+
+    @property
+    def key(self) -> str:
+        """Identitas stabil target per semester (semester, wilayah, output), mis. untuk item antrean kerja."""
+        return f"{self.semester_id}|{self.provinsi}/{self.kota}|{os.path.normpath(self.csv)}"
+
+    def accepts(self, sekolah: dict) -> bool:
+        return sekolah['bentuk_pendidikan'] in self.jenjang and sekolah['status_sekolah'] in self.jenis
+
+    def __repr__(self):
+        return f"Target({self.provinsi}/{self.kota} [{self.semester_id}] -> {self.csv})"
+
+
+def default_csv_name(kota: str) -> str:
+    # "KOTA MAKASSAR" -> "Makassar", "Kab. Bekasi" -> "Bekasi"
+    words = kota.replace('.', ' ').split()
+    while len(words) > 1 and words[0].upper() in ('KOTA', 'KAB', 'KABUPATEN'):
+        words = words[1:]
+    return '_'.join(word.capitalize() for word in words)
+
+
+def parse_semesters(values) -> list:
+    """
+    ['20241,20242', '20251'] -> ['20241', '20242', '20251'] (unik, urut naik,
+    supaya crawl inkremental membandingkan dengan semester sebelumnya).
+    """
+    if isinstance(values, (str, int)):
+        values = [values]
+    semesters = set()
+    for value in values:
+        for semester_id in str(value).split(','):
+            semester_id = semester_id.strip()
+            if not re.fullmatch(r'\d{4}[12]', semester_id):
+                raise ValueError(f"Semester '{semester_id}' tidak valid, gunakan format TAHUN+1/2 (mis. 20251)")
+            semesters.add(semester_id)
+    return sorted(semesters)
+
+
+def semester_path(path: str, semester_id: str, partition: bool = True) -> str:
+    """
+    Path output untuk satu semester: `{semester}` di path diganti id semester;
+    tanpa placeholder dan `partition`, id semester disisipkan sebelum ekstensi
+    (result/data_Depok.csv -> result/data_Depok_20251.csv).
+    """
+    if '{semester}' in path:
+        return path.replace('{semester}', semester_id)
+    if not partition:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}_{semester_id}{ext}"
+
+
+def load_config(path: str) -> dict:
+    """
+    Baca file konfigurasi target (.toml, .yaml/.yml, atau .json). Isinya:
+    daftar `target` (kota, provinsi, csv, jenjang, jenis) dan opsional
+    `engine`, `max_workers`, `outputs`, `incremental`, `semesters`, `columns`,
+    `projection`, `order`, `max_requests` serta `max_minutes`.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.toml':
+        if tomllib is None:
+            raise RuntimeError("Membaca file .toml butuh Python 3.11+ atau paket tomli")
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    elif ext in ('.yaml', '.yml'):
+        if yaml is None:
+            raise RuntimeError("Membaca file YAML butuh PyYAML: pip install pyyaml")
+        with open(path, encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    elif ext == '.json':
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+    else:
+        raise ValueError(f"Format konfigurasi '{ext}' tidak dikenal (pakai .toml, .yaml atau .json)")
+
+    config['target'] = [Target.from_dict(t) for t in config.get('target', [])]
+    return config
+
+
+def primary_first(outputs) -> list:
+    """
+    Urutkan output supaya yang pertama bisa jadi output utama (csv/sqlite,
+    durable per commit). Tanpa keduanya, CSV ditambahkan otomatis.
+    """
+    outputs = list(dict.fromkeys(outputs))
+    primary = next((kind for kind in outputs if kind in PRIMARY_OUTPUTS), 'csv')
+    return [primary] + [kind for kind in outputs if kind != primary]
+
+
+def log_target(target: Target):
+    log.info("=== TARGET: %s (%s) semester %s ===", target.kota, target.provinsi, target.semester_id,
+             extra={'event': 'target', 'kota': target.kota, 'provinsi': target.provinsi,
+                    'semester_id': target.semester_id, 'output': target.csv})
+
+
+# =========================
+# CRAWLER
+# =========================
+class Crawler:
+    """
+    Menjalankan semua target dalam satu proses. Hierarki wilayah di-resolve
+    sekali lewat RegionIndex bersama, sekolah dari semua kecamatan dan semua
+    target dikirim ke satu pool worker tanpa menunggu per kecamatan.
+    Status tiap sekolah dicatat di CrawlJournal, jadi resume tidak perlu
+    membaca ulang CSV dan sekolah yang terputus saat crash diulang persis.
+    Dengan beberapa semester, setiap target dipecah per semester (urut naik)
+    dan semuanya berbagi RegionIndex, pool koneksi dan pool worker yang sama.
+    `columns` membatasi kolom output: hanya endpoint detail (profil /
+    sekolahDetail) yang mengisi kolom itu yang diminta, dan jika semuanya ada
+    di listing progresSP, baris langsung diisi dari listing. Kolom lain
+    dikosongkan (`projection='empty'`) atau tidak ditulis ('omit').
+    """
+
+    def __init__(self, targets, engine: str = ENGINE, max_workers: int = MAX_WORKERS, journal: CrawlJournal = None,
+                 outputs=None, incremental: bool = INCREMENTAL, semesters=None, order: str = PLAN_ORDER,
+                 max_requests: int = None, max_minutes: float = None, columns=None, projection: str = PROJECTION):
+        if projection not in PROJECTIONS:
+            raise ValueError(f"Proyeksi '{projection}' tidak dikenal (pilihan: {', '.join(PROJECTIONS)})")
+        self.targets = list(targets)
+        self.columns = select_columns(columns)
+        self.projection = projection
+        self.detail_sources = detail_sources(self.columns)
+        self.order = order
+        self.max_requests = max_requests
+        self.max_seconds = max_minutes * 60 if max_minutes else None
+        self.deadline = None   # time.monotonic() batas budget waktu, diisi saat run dimulai
+        self.planned_requests = 0
+        self.semesters = parse_semesters(semesters or SEMESTERS)
+        partition = len(self.semesters) > 1
+        self.runs = [target.for_semester(semester_id, partition)
+                     for semester_id in self.semesters for target in self.targets]
+        self.incremental = incremental
+        self.stats = {'fetch': 0, 'reused': 0, 'skipped': 0, 'listing': 0}
+        self.engine = engine
+        self.max_workers = max_workers
+        self.outputs = primary_first(outputs or OUTPUTS)
+        self.sinks = {}        # csv -> [output utama, output tambahan...] untuk target ber-CSV itu
+        self.region_index = RegionIndex()
+        self.journal = journal or CrawlJournal()
+        self.journals = {semester_id: self.journal.for_semester(semester_id) for semester_id in self.semesters}
+        for semester_journal in self.journals.values():
+            semester_journal.recover()
+        self.pool = None       # satu ThreadPoolExecutor untuk seluruh run (lihat school_pool)
+        self.prepared = {}     # file output yang sudah disiapkan -> semester
+        self.dispatched = set() # (semester, id) yang sudah dikirim ke worker di run ini
+        self.progress = Progress('crawl')
+
+    def journal_for(self, target: Target) -> CrawlJournal:
+        return self.journals[target.semester_id]
+
+    @property
+    def requests_per_school(self) -> int:
+        return len(self.detail_sources)
+
+    # --- CSV & resume ---
+    def prepare_output(self, target: Target):
+        if target.csv in self.prepared:
+            return
+        self.prepared[target.csv] = target.semester_id
+        journal = self.journal_for(target)
+        os.makedirs(os.path.dirname(target.csv) or '.', exist_ok=True)
+        # proyeksi 'omit': output hanya memuat kolom yang diminta
+        columns = self.columns if self.projection == 'omit' else None
+        if 'csv' in self.outputs:
+            create_csv_header(target.csv, columns)
+        journal.import_output(target.csv)
+        sinks = [get_csv_writer(target.csv, columns) if kind == 'csv' else
+                 open_sink(kind, target.csv, target.semester_id, columns)
+                 for kind in self.outputs]
+        # baris baru ditandai 'done' di jurnal hanya setelah output utama benar-benar commit (fsync / COMMIT)
+        sinks[0].on_commit = lambda rows, output=target.csv: journal.mark_done(output, rows, self.columns)
+        self.sinks[target.csv] = sinks
+        counts = journal.counts(target.csv)
+        log.info("File target: %s. Skip %d ID yang sudah ada, %d belum selesai.", target.csv, counts['done'], counts['pending'],
+                 extra={'event': 'output', 'output': target.csv, 'done': counts['done'], 'pending': counts['pending']})
+
+    # --- wilayah ---
+    def resolve(self, target: Target):
+        """Cari provinsi & kota target di indeks wilayah (tanpa request jika indeks sudah ada)."""
+        province = self.region_index.find(target.provinsi, level=1)
+        kota = self.region_index.find(target.kota, parent=province['kode_wilayah']) if province else None
+        if kota is None:
+            log.error("❌ %s (%s) tidak ditemukan di indeks wilayah.", target.kota, target.provinsi)
+            return None
+        log.info("PROVINSI MATCH: %s (TARGET PROV) ✨", province['nama'])
+        log.info("  Kota/Kab MATCH: %s (TARGET KOTA) 🎯", kota['nama'])
+        return province, kota
+
+    def list_schools(self, target: Target, kecamatan: dict) -> list:
+        """Daftar sekolah satu kecamatan yang lolos filter target (None jika gagal diambil)."""
+        try:
+            response_sekolah = request_api(
+                level_wilayah=kecamatan['id_level_wilayah'],
+                kode_wilayah=kecamatan['kode_wilayah'].strip(),
+                semester_id=target.semester_id,
+                backoff=5
+            )
+        except RetryExhausted as e:
+            log.warning("    %s", e)
+            response_sekolah = None
+
+        if not response_sekolah:
+            return None
+        return [sekolah for sekolah in response_sekolah if target.accepts(sekolah)]
+
+    def jobs(self):
+        """
+        Generator (sekolah_id_enkrip, payload) untuk semua sekolah yang belum
+        selesai, payload = (target, sekolah, provinsi, kota, kecamatan).
+        Sekolah yang tertunda dari run sebelumnya dikirim lebih dulu.
+        Target sudah dipecah per semester; semester dari target di payload.
+        Daftar sekolah kecamatan berikutnya diambil di depan (prefetch_listings),
+        jadi sekolah mengalir terus ke pool tanpa jeda antar kecamatan.
+        """
+        for target in self.runs:
+            log_target(target)
+            self.prepare_output(target)
+            for sekolah, province_name, city_name, kecamatan_name in self.journal_for(target).unfinished(target.csv):
+                sid = sekolah['sekolah_id_enkrip'].strip()
+                if (target.semester_id, sid) not in self.dispatched:
+                    self.dispatched.add((target.semester_id, sid))
+                    payload = (target, sekolah, province_name, city_name, kecamatan_name)
+                    if not self.detail_sources:
+                        self.save_listing(payload)
+                        continue
+                    self.progress.add('queued')
+                    yield sid, payload
+
+        for (target, province, kota, kecamatan), sekolah_to_process in self.prefetch_listings(self.kecamatan_units()):
+            log.info("    Kecamatan: %s (%s, semester %s)", kecamatan['nama'], target.kota, target.semester_id,
+                     extra={'event': 'kecamatan', 'kecamatan': kecamatan['nama'], 'kota': target.kota,
+                            'semester_id': target.semester_id,
+                            'schools': None if sekolah_to_process is None else len(sekolah_to_process)})
+            if sekolah_to_process is None:
+                log.warning("    ❌ GAGAL mengambil daftar sekolah. Melanjutkan.")
+                continue
+            if not sekolah_to_process:
+                log.info("    Tidak ada sekolah yang memenuhi kriteria di kecamatan ini.")
+                continue
+
+            self.planned_requests += 1
+            for sekolah in sekolah_to_process:
+                if self.over_budget():
+                    return
+                payload = (target, sekolah, province['nama'], kota['nama'], kecamatan['nama'])
+                if self.admit(payload):
+                    self.planned_requests += self.requests_per_school
+                    yield sekolah['sekolah_id_enkrip'].strip(), payload
+
+    # --- budget ---
+    def start_budget(self):
+        if self.max_seconds:
+            self.deadline = time.monotonic() + self.max_seconds
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def over_budget(self) -> bool:
+        """Budget waktu / request habis: sisa sekolah tetap 'pending' untuk run berikutnya."""
+        exceeded = self.expired() or (self.max_requests is not None and
+                                      self.planned_requests + self.requests_per_school > self.max_requests)
+        if exceeded and not self.stats.get('budget'):
+            self.stats['budget'] = True
+            log.warning("[PLAN] Budget habis (%d request direncanakan), sekolah berikutnya ditunda.", self.planned_requests,
+                        extra={'event': 'budget', 'planned_requests': self.planned_requests})
+        return exceeded
+
+    def kecamatan_units(self):
+        """
+        (target, provinsi, kota, kecamatan) untuk setiap kecamatan semua target:
+        urut target, atau menurut CrawlPlan (urutan `order`, dipotong budget).
+        """
+        if self.order != 'natural' or self.max_requests or self.max_seconds:
+            plan = build_plan(self, self.order, self.max_requests, self.max_seconds)
+            plan.print_summary()
+            yield from plan.units()
+            return
+        for target in self.runs:
+            resolved = self.resolve(target)
+            if resolved is None:
+                continue
+            province, kota = resolved
+            for kecamatan in self.region_index.children(kota['kode_wilayah']):
+                yield target, province, kota, kecamatan
+
+    def prefetch_listings(self, units, depth: int = LISTING_PREFETCH):
+        """
+        Ambil daftar sekolah sampai `depth` kecamatan di depan secara paralel
+        (tetap dibatasi rate limiter progresSP) dan kembalikan (unit, daftar)
+        sesuai urutan kecamatan.
+        """
+        window = deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=depth, thread_name_prefix='listing') as pool:
+            for unit in units:
+                window.append((unit, pool.submit(self.list_schools, unit[0], unit[3])))
+                if len(window) >= depth:
+                    unit, future = window.popleft()
+                    yield unit, future.result()
+            while window:
+                unit, future = window.popleft()
+                yield unit, future.result()
+
+    def admit(self, payload) -> bool:
+        """
+        Putuskan satu sekolah hasil listing: True jika perlu diambil (sudah
+        dicatat 'pending' di jurnal), False jika dilewati, baris lamanya
+        dipakai ulang (crawl inkremental) atau barisnya sudah ditulis dari
+        listing (semua kolom yang diminta ada di listing).
+        """
+        target, sekolah = payload[:2]
+        journal = self.journal_for(target)
+        sid = sekolah['sekolah_id_enkrip'].strip()
+        if (target.semester_id, sid) in self.dispatched:
+            return False
+        fingerprint = listing_fingerprint(sekolah)
+        if journal.moved(sid, target.csv, self.columns):
+            # path output semester ini berubah sejak sekolah selesai: salin barisnya tanpa request
+            self.reuse_row(payload, fingerprint)
+            return False
+        reopen = False
+        if self.incremental:
+            action = self.incremental_action(journal, sid, fingerprint)
+            if action == 'skip':
+                self.stats['skipped'] += 1
+                self.progress.add('skipped')
+                log.debug("      Sekolah (SKIP, tidak berubah): %s", sekolah['nama'],
+                          extra={'event': 'school_skipped', 'sekolah_id': sid, 'reason': 'unchanged'})
+                return False
+            if action == 'reuse':
+                self.reuse_row(payload, fingerprint)
+                return False
+            reopen = True
+        if not journal.enqueue(target.csv, sekolah, *payload[2:], fingerprint=fingerprint, reopen=reopen,
+                               columns=self.columns):
+            self.stats['skipped'] += 1
+            self.progress.add('skipped')
+            log.debug("      Sekolah (SKIP, sudah di CSV): %s", sekolah['nama'],
+                      extra={'event': 'school_skipped', 'sekolah_id': sid, 'reason': 'done'})
+            return False
+        self.dispatched.add((target.semester_id, sid))
+        if not self.detail_sources:
+            self.save_listing(payload)
+            return False
+        self.stats['fetch'] += 1
+        self.progress.add('queued')
+        return True
+
+    # --- crawl inkremental ---
+    def incremental_action(self, journal: CrawlJournal, sekolah_id_enkrip: str, fingerprint: str) -> str:
+        """
+        Bandingkan fingerprint listing dengan catatan terakhir di jurnal:
+        'skip'  -> sudah selesai di semester ini dan tidak berubah,
+        'reuse' -> tidak berubah sejak semester sebelumnya, baris lama dipakai ulang,
+        'fetch' -> sekolah baru / berubah, ambil HTML + sekolahDetail.
+        """
+        previous = journal.previous(sekolah_id_enkrip)
+        if previous is None or not covers(previous['columns'], self.columns):
+            return 'fetch'  # baru, atau baris lama tidak memuat semua kolom yang diminta run ini
+        current = previous['semester_id'] == journal.semester_id
+        if previous['fingerprint'] is None:
+            # baris hasil impor CSV lama: jadikan baseline tanpa mengambil ulang
+            if current:
+                journal.set_fingerprint(sekolah_id_enkrip, fingerprint)
+                return 'skip'
+            return 'fetch'
+        if previous['fingerprint'] != fingerprint:
+            return 'fetch'
+        if current:
+            return 'skip'
+        return 'reuse' if previous['row'] is not None else 'fetch'
+
+    def reuse_row(self, payload, fingerprint: str):
+        """Tulis ulang baris output lama (sekolah tidak berubah / output dipindah) tanpa request."""
+        target, sekolah, province_name, city_name, kecamatan_name = payload
+        sid = sekolah['sekolah_id_enkrip'].strip()
+        journal = self.journal_for(target)
+        row = journal.previous(sid)['row']
+        journal.enqueue(target.csv, sekolah, province_name, city_name, kecamatan_name,
+                        fingerprint=fingerprint, reopen=True)
+        self.dispatched.add((target.semester_id, sid))
+        self.stats['reused'] += 1
+        self.progress.add('reused')
+        row = self.project(payload, row)
+        primary, *extras = self.sinks[target.csv]
+        if primary.write_row(row):
+            for sink in extras:
+                sink.write_row(row)
+            log.debug("      Sekolah (TIDAK BERUBAH, baris lama dipakai): %s", sekolah['nama'],
+                      extra={'event': 'school_skipped', 'sekolah_id': sid, 'reason': 'reused'})
+
+    # --- satu sekolah ---
+    def process_school(self, payload, dead_letter: bool = True):
+        """
+        Memproses detail satu sekolah dan menyimpannya ke CSV target.
+        Setiap request sudah punya retry sendiri (RETRY_POLICY), jadi sekolah
+        hanya dicoba ulang (maksimal SCHOOL_MAX_ATTEMPTS, jeda full jitter)
+        jika request berhenti karena budget retry global habis; 4xx permanen,
+        batas percobaan request dan error parsing langsung menyerah.
+        Jika tetap gagal, sekolah dicatat di dead-letter file target dan
+        fungsi mengembalikan None.
+        """
+        target, sekolah, province_name, city_name, kecamatan_name = payload
+        sekolah_id_enkrip = sekolah['sekolah_id_enkrip'].strip()
+        journal = self.journal_for(target)
+        if self.expired():
+            return None  # budget waktu habis sebelum sekolah ini mulai: tetap 'pending' di jurnal
+
+        retry_count = 0
+        while True:
+            retry_count += 1
+            log.debug("      Sekolah: %s (Percobaan ke-%d)", sekolah['nama'], retry_count,
+                      extra={'event': 'school_attempt', 'sekolah_id': sekolah_id_enkrip, 'attempt': retry_count})
+            journal.start(sekolah_id_enkrip)
+
+            try:
+                # thread ini hanya mengunduh; parsing & baris CSV dikerjakan pool proses parser
+                html, recapitulation = fetch_school_raw(school_url(sekolah_id_enkrip), target.semester_id,
+                                                        self.detail_sources)
+                row = run_parser(school_row_from_raw, html, recapitulation, sekolah_id_enkrip, sekolah['nama'],
+                                 province_name, city_name, kecamatan_name)
+                if self.save_row(payload, row):
+                    return sekolah_id_enkrip
+                error = "Gagal menyimpan ke CSV"
+
+            except Exception as e:
+                # Timeout, 404, 429, anti-bot yang tidak kunjung lolos, dll.
+                error = str(e)
+                log.warning("      ❌ Error processing school %s: %s", sekolah['nama'], e,
+                            extra={'event': 'school_error', 'sekolah_id': sekolah_id_enkrip, 'attempt': retry_count})
+                transient = isinstance(e, RetryExhausted) and e.transient
+            else:
+                transient = False
+
+            delay_time = RETRY_POLICY.next_delay(retry_count, RETRY_DELAY, SCHOOL_MAX_ATTEMPTS) if transient else None
+            if delay_time is None:
+                log.error("      ☠️ MENYERAH: %s setelah %d percobaan, dicatat ke %s", sekolah['nama'], retry_count,
+                          target.dead_letter_file,
+                          extra={'event': 'school_failed', 'sekolah_id': sekolah_id_enkrip, 'error': error})
+                self.progress.add('failed')
+                journal.mark_failed(sekolah_id_enkrip, error)
+                if dead_letter:
+                    append_dead_letter(target.dead_letter_file, sekolah, province_name, city_name, kecamatan_name, error, retry_count)
+                return None
+
+            log.debug("      ⏳ Menunggu %.1f detik sebelum mencoba ulang...", delay_time)
+            time.sleep(delay_time)
+
+    def save_result(self, payload, school_data) -> bool:
+        """Susun baris dari hasil parse_html lalu simpan (handler engine asyncio & worker)."""
+        target, sekolah, province_name, city_name, kecamatan_name = payload
+        row = build_csv_row(sekolah['sekolah_id_enkrip'].strip(), school_data, sekolah['nama'],
+                            province_name, city_name, kecamatan_name)
+        return self.save_row(payload, row)
+
+    def save_listing(self, payload) -> bool:
+        """Simpan baris yang diisi dari listing saja (tanpa request per sekolah)."""
+        self.stats['listing'] += 1
+        self.progress.add('queued')
+        return self.save_row(payload, build_listing_row(*payload[1:]))
+
+    def project(self, payload, row) -> list:
+        """Baris sesuai `columns`; kolom dari endpoint yang tidak diambil diisi dari listing."""
+        if len(self.columns) == len(CSV_HEADERS):
+            return row
+        return project_row(row, self.columns, self.detail_sources, build_listing_row(*payload[1:]))
+
+    def save_row(self, payload, row) -> bool:
+        """
+        Simpan satu baris ke output utama target (CsvWriter bersama dengan
+        group commit, atau SqliteSink) lalu ke output tambahan. Kolom yang
+        tidak diminta (`columns`) dikosongkan.
+        """
+        target, sekolah = payload[:2]
+        row = self.project(payload, row)
+        primary, *extras = self.sinks[target.csv]
+        write_successful = primary.write_row(row)
+        if write_successful:
+            for sink in extras:
+                sink.write_row(row)
+            self.progress.add('done')
+            log.info("      ✅ SUCCESS: %s berhasil disimpan.", sekolah['nama'],
+                     extra={'event': 'school_saved', 'sekolah_id': row[0], 'output': target.csv})
+        else:
+            log.error("      ⚠️ GAGAL DISIMPAN ke %s: %s", self.outputs[0].upper(), sekolah['nama'],
+                      extra={'event': 'school_unsaved', 'sekolah_id': row[0], 'output': target.csv})
+        return write_successful
+
+    def save_failure(self, payload, error):
+        """Handler engine asyncio: sekolah yang gagal dicatat ke dead-letter file target."""
+        target, sekolah, province_name, city_name, kecamatan_name = payload
+        self.progress.add('failed')
+        self.journal_for(target).mark_failed(sekolah['sekolah_id_enkrip'].strip(), str(error))
+        append_dead_letter(target.dead_letter_file, sekolah, province_name, city_name, kecamatan_name, str(error), 1)
+
+    def flush_outputs(self):
+        """Tunggu output utama commit, jadi baris yang sudah ditulis tercatat 'done' (beserta isinya) di jurnal."""
+        for primary, *_ in self.sinks.values():
+            primary.flush()
+
+    def close_outputs(self):
+        close_csv_writers()
+        for sinks in self.sinks.values():
+            for sink in sinks:
+                sink.close()
+        self.sinks.clear()
+
+    # --- run ---
+    def school_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Pool worker sekolah, dibuat sekali dan dipakai semua target, kecamatan dan retry."""
+        if self.pool is None:
+            self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sekolah')
+        return self.pool
+
+    def close_pool(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+    def semester_passes(self):
+        """
+        Crawl inkremental beberapa semester: satu pass per semester (urut naik),
+        self.runs dibatasi ke semester itu dan output di-flush sebelum pass
+        berikutnya, jadi sekolah yang tidak berubah di semester N+1 memakai
+        ulang baris semester N. Selain itu satu pass untuk semua target.
+        """
+        runs = self.runs
+        if not self.incremental or len(self.semesters) == 1:
+            yield runs
+            return
+        try:
+            for semester_id in self.semesters:
+                self.runs = [target for target in runs if target.semester_id == semester_id]
+                yield self.runs
+                self.flush_outputs()
+        finally:
+            self.runs = runs
+
+    def async_jobs(self):
+        for sid, payload in self.jobs():
+            if self.expired():
+                self.over_budget()
+                return
+            self.journal_for(payload[0]).start(sid)
+            yield sid, payload, payload[0].semester_id, self.detail_sources
+
+    def run(self):
+        self.start_budget()
+        self.progress.start()
+        if self.engine == 'async':
+            log.info("Memulai engine asyncio (max %d sekolah bersamaan)...", ASYNC_CONCURRENCY)
+            for _ in self.semester_passes():
+                # listing berjalan di thread terpisah sambil sekolah yang sudah didapat diproses
+                run_schools_async(self.async_jobs(), self.save_result, concurrency=ASYNC_CONCURRENCY,
+                                  on_error=self.save_failure)
+        else:
+            log.info("Memulai pool ThreadPoolExecutor (max %d threads, window AIMD %d)...", self.max_workers, CONCURRENCY.limit)
+            executor = self.school_pool()
+            # sekolah yang dikirim ke pool (jalan + antre) dibatasi; saat penuh generator jobs()
+            # tidak dilanjutkan, jadi listing kecamatan berikutnya juga tertahan
+            slots = threading.BoundedSemaphore(self.max_workers * PENDING_PER_WORKER)
+
+            def release(future, sid):
+                futures.discard(future)
+                slots.release()
+                # process_school menangani error request/parse sendiri; yang sampai di sini
+                # (jurnal, dead-letter file, ...) dicatat supaya tidak hilang diam-diam
+                error = None if future.cancelled() else future.exception()
+                if error is not None:
+                    log.error("      🚨 Sekolah %s berhenti dengan error tak tertangani: %r", sid, error,
+                              exc_info=error, extra={'event': 'school_crashed', 'sekolah_id': sid})
+
+            for _ in self.semester_passes():
+                futures = set()
+                for sid, payload in self.jobs():
+                    slots.acquire()
+                    future = executor.submit(self.process_school, payload)
+                    futures.add(future)
+                    future.add_done_callback(lambda future, sid=sid: release(future, sid))
+                concurrent.futures.wait(list(futures))
+            self.close_pool()
+        self.finish()
+
+    def finish(self):
+        """Tutup semua output lalu catat progres akhir, ringkasan jurnal dan sesi."""
+        self.close_outputs()
+        self.progress.stop()
+        for output, semester_id in sorted(self.prepared.items()):
+            counts = self.journals[semester_id].counts(output)
+            log.info("[JOURNAL] %s: %d done, %d failed, %d belum selesai", output, counts['done'], counts['failed'],
+                     counts['pending'] + counts['inflight'], extra={'event': 'journal_summary', 'output': output, **counts})
+        if self.incremental:
+            log.info("[INCREMENTAL] %d baru/berubah diambil, %d tidak berubah (baris lama), %d sudah selesai",
+                     self.stats['fetch'], self.stats['reused'], self.stats['skipped'],
+                     extra={'event': 'incremental_summary', **self.stats})
+        if not self.detail_sources:
+            log.info("[LISTING] %d baris diisi dari listing, tanpa request per sekolah (%d kolom)",
+                     self.stats['listing'], len(self.columns), extra={'event': 'listing_summary', 'rows': self.stats['listing']})
+        print_session_stats()
+        log.info("SCRAPE %s SELESAI! ✅", ', '.join(target.kota for target in self.targets), extra={'event': 'finished'})
+
+    def retry_failed(self):
+        """Mode --retry-failed: proses ulang hanya sekolah di dead-letter file tiap target."""
+        seen = set()
+        for target in self.runs:
+            dead_letter_file = target.dead_letter_file
+            if dead_letter_file in seen:
+                continue # target lain dengan CSV yang sama sudah memprosesnya
+            seen.add(dead_letter_file)
+            records = load_dead_letters(dead_letter_file)
+            log.info("=== RETRY FAILED: %d sekolah di %s ===", len(records), dead_letter_file)
+            if not records:
+                continue
+
+            self.prepare_output(target)
+            still_failed = []
+
+            executor = self.school_pool()
+            futures = {}
+            for record in records:
+                payload = (target, record['sekolah'], record['province'], record['kota'], record['kecamatan'])
+                futures[executor.submit(self.process_school, payload, False)] = record
+
+            for future in concurrent.futures.as_completed(futures):
+                if future.result() is None:
+                    record = futures[future]
+                    record['attempts'] += SCHOOL_MAX_ATTEMPTS
+                    still_failed.append(record)
+
+            # Hanya sekolah yang masih gagal yang tersisa di dead-letter file
+            self.close_outputs()
+            rewrite_dead_letters(dead_letter_file, still_failed)
+            log.info("RETRY FAILED SELESAI: %d berhasil, %d masih gagal.", len(records) - len(still_failed), len(still_failed))
+        self.close_pool()
+
+
+def run(targets, engine: str = ENGINE, max_workers: int = MAX_WORKERS, retry_failed: bool = False, outputs=None,
+        incremental: bool = INCREMENTAL, semesters=None, order: str = PLAN_ORDER, max_requests: int = None,
+        max_minutes: float = None, columns=None, projection: str = PROJECTION):
+    """Titik masuk untuk skrip lama dan CLI `python -m dapodik`."""
+    ensure_logging()
+    crawler = Crawler(targets, engine=engine, max_workers=max_workers, outputs=outputs, incremental=incremental,
+                      semesters=semesters, order=order, max_requests=max_requests, max_minutes=max_minutes,
+                      columns=columns, projection=projection)
+    if retry_failed:
+        crawler.retry_failed()
+    else:
+        crawler.run()
+    return crawler
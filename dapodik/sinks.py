@@ -0,0 +1,414 @@
+import os
+import csv
+import time
+import datetime
+import sqlite3
+import logging
+import threading
+
+# ==========================================================
+# SINK OUTPUT (KOLOMNAR BERTIPE & SQLITE UPSERT)
+# ==========================================================
+# Semua sink punya antarmuka yang sama dengan CsvWriter:
+#   append(sekolah_id_enkrip, school_data, school_name, province, kota, kecamatan)
+#   write_row(row)   # row = list urutan CSV_HEADERS
+#   flush(), close(), on_commit(rows)
+# Output pertama di daftar `outputs` runner adalah output utama: on_commit-nya
+# yang menandai 'done' di jurnal crawl, jadi harus durable per commit (csv
+# atau sqlite). Parquet/arrow hanya sebagai output tambahan.
+from .utils import SEMESTER_ID, CSV_HEADERS, align_csv_row, build_csv_row
+
+try:
+    import pyarrow as pa  # opsional, hanya untuk output parquet/arrow
+    import pyarrow.parquet as pq
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+log = logging.getLogger(__name__)
+
+# =========================
+# KONFIGURASI
+# =========================
+ARROW_ROW_GROUP = 5000      # baris per row group / record batch
+ARROW_COMPRESSION = 'zstd'
+SQLITE_BATCH_ROWS = 500     # upsert per transaksi
+SQLITE_BATCH_SECONDS = 2.0
+SQLITE_SYNCHRONOUS = 'FULL' # setiap COMMIT di-fsync: baris yang sudah COMMIT (dan 'done' di jurnal) tahan crash
+SQLITE_INDEXES = ['Provinsi', 'Kota_Kabupaten', 'Kecamatan', 'NPSN']
+
+# Tipe kolom; kolom yang tidak disebut bertipe string.
+INT_COLUMNS = CSV_HEADERS[CSV_HEADERS.index('Guru_L'):] # Guru_L ... Rombel
+FLOAT_COLUMNS = ['Lintang', 'Bujur']
+DATE_COLUMNS = ['Tanggal_SK_Pendirian', 'Tanggal_SK_Izin_Operasional']
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+
+COLUMN_TYPES = {column: 'string' for column in CSV_HEADERS}
+COLUMN_TYPES.update({column: 'int' for column in INT_COLUMNS})
+COLUMN_TYPES.update({column: 'float' for column in FLOAT_COLUMNS})
+COLUMN_TYPES.update({column: 'date' for column in DATE_COLUMNS})
+
+
+def typed_value(column: str, value):
+    """Ubah nilai teks CSV ke tipe kolomnya; nilai kosong / '-' / tidak valid -> None."""
+    kind = COLUMN_TYPES.get(column, 'string')
+    if kind == 'string':
+        return None if value is None else str(value)
+    if value is None or isinstance(value, str) and value.strip() in ('', '-'):
+        return None
+    try:
+        if kind == 'int':
+            return int(float(value))
+        if kind == 'float':
+            return float(str(value).replace(',', '.'))
+    except ValueError:
+        return None
+    if isinstance(value, datetime.date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def typed_row(row) -> dict:
+    return {column: typed_value(column, value) for column, value in zip(CSV_HEADERS, row)}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Output parquet/arrow butuh pyarrow: pip install pyarrow")
+
+
+def arrow_schema():
+    _require_pyarrow()
+    types = {'string': pa.string(), 'int': pa.int32(), 'float': pa.float64(), 'date': pa.date32()}
+    return pa.schema([pa.field(column, types[COLUMN_TYPES[column]]) for column in CSV_HEADERS])
+
+
+class ArrowSink:
+    """
+    Sink kolomnar bertipe. Output berupa folder dataset (mis.
+    result/data_Depok.parquet/) berisi satu file part per run, jadi run
+    berikutnya tidak perlu menulis ulang file lama. Baris di-buffer lalu
+    ditulis per row group (`row_group_size`) dengan kompresi zstd.
+
+    - format 'parquet': paling ringkas, file part valid setelah close().
+    - format 'arrow'  : Arrow IPC stream, batch yang sudah ditulis tetap
+                        terbaca walau proses crash sebelum close().
+    """
+
+    def __init__(self, path: str, format: str = 'parquet', row_group_size: int = ARROW_ROW_GROUP,
+                 compression: str = ARROW_COMPRESSION):
+        _require_pyarrow()
+        if format not in ('parquet', 'arrow'):
+            raise ValueError(f"Format sink '{format}' tidak dikenal")
+        self.path = path
+        self.format = format
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = arrow_schema()
+        self.rows_written = 0
+        self.on_commit = None
+        self._rows = []
+        self._lock = threading.Lock()
+        self._writer = None
+        self._sink = None
+        self._closed = False
+        os.makedirs(path, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        self.part_file = os.path.join(path, f"part-{stamp}-{os.getpid()}.{format}")
+
+    def append(self,
+               sekolah_id_enkrip: str,
+               school_data: dict,
+               school_name: str,
+               province: str,
+               kota: str,
+               kecamatan: str) -> bool:
+        return self.write_row(build_csv_row(sekolah_id_enkrip, school_data, school_name, province, kota, kecamatan))
+
+    def write_row(self, row: list) -> bool:
+        with self._lock:
+            if self._closed:
+                log.error("🚨 ERROR TULIS %s: sink '%s' sudah ditutup. Data ini dilewati.", self.format.upper(), self.path)
+                return False
+            self._rows.append(row)
+            if len(self._rows) >= self.row_group_size:
+                self._write_batch()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        with self._lock:
+            self._write_batch()
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._write_batch()
+            self._closed = True
+            if self._writer is not None:
+                self._writer.close()
+                if self._sink is not None:
+                    self._sink.close()
+
+    def _open(self):
+        if self.format == 'parquet':
+            self._writer = pq.ParquetWriter(self.part_file, self.schema, compression=self.compression)
+        else:
+            self._sink = pa.OSFile(self.part_file, 'wb')
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = pa.ipc.new_stream(self._sink, self.schema, options=options)
+
+    def _write_batch(self):
+        # dipanggil dengan self._lock
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        columns = {column: [] for column in CSV_HEADERS}
+        for row in rows:
+            for column, value in zip(CSV_HEADERS, row):
+                columns[column].append(typed_value(column, value))
+        batch = pa.record_batch([pa.array(columns[field.name], type=field.type) for field in self.schema],
+                                schema=self.schema)
+        if self._writer is None:
+            self._open()
+        if self.format == 'parquet':
+            self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_batch(batch)
+            self._sink.flush()
+        self.rows_written += len(rows)
+        if self.on_commit is not None:
+            self.on_commit(rows)
+
+
+def columnar_path(csv_filename: str, format: str = 'parquet') -> str:
+    """result/data_Depok.csv -> result/data_Depok.parquet (folder dataset)"""
+    return os.path.splitext(csv_filename)[0] + '.' + format
+
+
+def read_table(path: str, columns=None, format: str = None):
+    """
+    Baca folder dataset ArrowSink sebagai satu pyarrow.Table bertipe.
+    Contoh agregasi: read_table('result/data_Depok.parquet').group_by('Kecamatan').aggregate(...)
+    """
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+    format = format or ('arrow' if path.rstrip('/').endswith('.arrow') else 'parquet')
+    files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.' + format))
+
+    if format == 'arrow':
+        # stream IPC: batch yang utuh tetap dibaca walau file terpotong (crash sebelum close)
+        batches = []
+        for filename in files:
+            try:
+                with pa.OSFile(filename, 'rb') as f:
+                    for batch in pa.ipc.open_stream(f):
+                        batches.append(batch)
+            except (pa.ArrowInvalid, OSError) as e:
+                log.warning("[ARROW] Sisa %s dilewati: %s", os.path.basename(filename), e)
+        table = pa.Table.from_batches(batches, schema=arrow_schema())
+        return table.select(columns) if columns else table
+
+    valid = []
+    for filename in files:
+        try:
+            pq.ParquetFile(filename)
+            valid.append(filename)
+        except (pa.ArrowInvalid, OSError) as e:
+            # file part tanpa footer (run crash sebelum close); barisnya masih ada di CSV
+            log.warning("[PARQUET] %s dilewati: %s", os.path.basename(filename), e)
+    return ds.dataset(valid, format='parquet', schema=arrow_schema()).to_table(columns=columns)
+
+
+def csv_to_columnar(csv_filename: str, path: str = None, format: str = 'parquet') -> int:
+    """Konversi CSV hasil crawl lama ke folder dataset bertipe. Mengembalikan jumlah baris."""
+    sink = ArrowSink(path or columnar_path(csv_filename, format), format=format)
+    count = 0
+    with open(csv_filename, 'r', newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if header is None:
+            sink.close()
+            return 0
+        for values in reader:
+            sink.write_row(align_csv_row(values, header))
+            count += 1
+    sink.close()
+    log.info("[%s] %d baris dari %s -> %s", format.upper(), count, csv_filename, sink.part_file)
+    return count
+
+
+class SqliteSink:
+    """
+    Output SQLite dengan upsert: satu baris per (sekolah_id_enkrip,
+    semester_id), jadi crawl ulang atau dua target yang berbagi output
+    (Kota & Kab. Bekasi) tidak menumpuk duplikat. Baris di-buffer lalu
+    di-upsert per transaksi (`batch_rows` baris atau `batch_seconds` detik;
+    thread timer meng-commit baris yang tertahan walau tidak ada baris baru,
+    seperti CsvWriter); on_commit dipanggil setelah transaksi COMMIT.
+    Kolom bertipe (INTEGER/REAL, tanggal ISO) mengikuti COLUMN_TYPES.
+    Dengan `columns` (proyeksi 'omit') hanya kolom itu yang di-upsert;
+    kolom lain baris yang sudah ada tidak disentuh.
+    """
+
+    SQL_TYPES = {'string': 'TEXT', 'int': 'INTEGER', 'float': 'REAL', 'date': 'TEXT'}
+
+    def __init__(self, path: str, semester_id: str = SEMESTER_ID, batch_rows: int = SQLITE_BATCH_ROWS,
+                 batch_seconds: float = SQLITE_BATCH_SECONDS, table: str = 'sekolah', columns=None,
+                 synchronous: str = SQLITE_SYNCHRONOUS):
+        self.path = path
+        self.semester_id = semester_id
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_seconds
+        self.table = table
+        self.columns = [column for column in CSV_HEADERS if column in columns] if columns else list(CSV_HEADERS)
+        self.rows_written = 0
+        self.on_commit = None
+        self._rows = []
+        self._first_row_at = None
+        self._lock = threading.Lock()
+        self._closed = False
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._create_schema()
+        columns = ['semester_id', *self.columns, 'updated_at']
+        updates = ', '.join(f'{column} = excluded.{column}' for column in _quoted(columns[2:]))
+        self._upsert = (
+            f'INSERT INTO {table} ({", ".join(_quoted(columns))}) '
+            f'VALUES ({", ".join("?" for _ in columns)}) '
+            f'ON CONFLICT (sekolah_id_enkrip, semester_id) DO UPDATE SET {updates}'
+        )
+        self._stop = threading.Event()
+        self._timer = threading.Thread(target=self._run, name=f"sqlite-sink:{os.path.basename(path)}", daemon=True)
+        self._timer.start()
+
+    def _create_schema(self):
+        columns = ',\n    '.join(f'"{column}" {self.SQL_TYPES[COLUMN_TYPES[column]]}' for column in CSV_HEADERS)
+        self._conn.executescript(f"""
+CREATE TABLE IF NOT EXISTS {self.table} (
+    semester_id TEXT NOT NULL,
+    {columns},
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (sekolah_id_enkrip, semester_id)
+);
+""" + ''.join(f'CREATE INDEX IF NOT EXISTS idx_{self.table}_{column.lower()} ON {self.table} ("{column}");\n'
+              for column in SQLITE_INDEXES))
+
+    def append(self,
+               sekolah_id_enkrip: str,
+               school_data: dict,
+               school_name: str,
+               province: str,
+               kota: str,
+               kecamatan: str) -> bool:
+        return self.write_row(build_csv_row(sekolah_id_enkrip, school_data, school_name, province, kota, kecamatan))
+
+    def write_row(self, row: list) -> bool:
+        with self._lock:
+            if self._closed:
+                log.error("🚨 ERROR TULIS SQLITE: sink '%s' sudah ditutup. Data ini dilewati.", self.path)
+                return False
+            if not self._rows:
+                self._first_row_at = time.monotonic()
+            self._rows.append(row)
+            if len(self._rows) >= self.batch_rows or time.monotonic() - self._first_row_at >= self.batch_seconds:
+                # gagal -> baris tetap di buffer dan dicoba lagi, jadi bukan data yang hilang
+                self._commit_batch()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        with self._lock:
+            return self._commit_batch()
+
+    def close(self):
+        self._stop.set()
+        if self._timer is not threading.current_thread():
+            self._timer.join()
+        with self._lock:
+            if self._closed:
+                return
+            if not self._commit_batch():
+                log.error("🚨 ERROR TULIS SQLITE: %d baris gagal ditulis ke '%s'.", len(self._rows), self.path)
+            self._closed = True
+            self._conn.close()
+
+    def _run(self):
+        # commit berbasis waktu: baris tidak tertahan lebih dari ~batch_seconds walau crawl lambat
+        timeout = self.batch_seconds
+        while not self._stop.wait(timeout):
+            with self._lock:
+                if self._closed:
+                    return
+                if self._rows and time.monotonic() - self._first_row_at >= self.batch_seconds:
+                    self._commit_batch()
+                waited = time.monotonic() - self._first_row_at if self._rows else 0.0
+            timeout = max(0.05, self.batch_seconds - waited)
+
+    def _commit_batch(self) -> bool:
+        # dipanggil dengan self._lock
+        if not self._rows:
+            return True
+        rows, self._rows = self._rows, []
+        now = time.time()
+        params = []
+        for row in rows:
+            values = [typed_value(column, value) for column, value in zip(CSV_HEADERS, row) if column in self.columns]
+            values = [value.isoformat() if isinstance(value, datetime.date) else value for value in values]
+            params.append([self.semester_id, *values, now])
+        try:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(self._upsert, params)
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            self._rows = rows + self._rows # dicoba lagi di batch berikutnya
+            self._first_row_at = time.monotonic() # timer mencoba lagi setelah batch_seconds, tidak berputar
+            log.error("🚨 ERROR TULIS SQLITE: %s. %d baris dicoba lagi.", e, len(rows))
+            return False
+        self.rows_written += len(rows)
+        if self.on_commit is not None:
+            # seperti CsvWriter._commit: baris sudah COMMIT, error jurnal tidak boleh menggagalkannya
+            try:
+                self.on_commit(rows)
+            except Exception as e:
+                log.error("[SQLITE] on_commit gagal untuk %d baris: %s", len(rows), e)
+        return True
+
+
+def _quoted(columns):
+    return [f'"{column}"' for column in columns]
+
+
+def sqlite_path(csv_filename: str) -> str:
+    """result/data_Depok.csv -> result/data_Depok.sqlite"""
+    return os.path.splitext(csv_filename)[0] + '.sqlite'
+
+
+# =========================
+# REGISTRY SINK
+# =========================
+# columns: kolom yang ditulis (proyeksi 'omit'); parquet/arrow tetap memakai skema penuh
+# supaya semua file part satu dataset sama skemanya (kolom kosong = null, nyaris tanpa biaya)
+SINKS = {
+    'parquet': lambda csv_filename, semester_id, columns: ArrowSink(columnar_path(csv_filename, 'parquet'), format='parquet'),
+    'arrow': lambda csv_filename, semester_id, columns: ArrowSink(columnar_path(csv_filename, 'arrow'), format='arrow'),
+    'sqlite': lambda csv_filename, semester_id, columns: SqliteSink(sqlite_path(csv_filename), semester_id, columns=columns),
+}
+# output yang durable per commit, boleh menjadi output utama (dasar jurnal crawl)
+PRIMARY_OUTPUTS = ('csv', 'sqlite')
+
+
+def open_sink(kind: str, csv_filename: str, semester_id: str = SEMESTER_ID, columns=None):
+    """Buka sink `kind` untuk output yang berdampingan dengan csv_filename."""
+    if kind not in SINKS:
+        raise ValueError(f"Output '{kind}' tidak dikenal (pilihan: csv, {', '.join(SINKS)})")
+    return SINKS[kind](csv_filename, semester_id, columns)
@@ -0,0 +1,2162 @@
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+import re 
+import json
+import csv
+import time
+import urllib3
+import os
+import gzip
+import hashlib
+import random
+import asyncio
+import threading
+import io
+import queue
+import atexit
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import OrderedDict, deque
+from contextlib import contextmanager, asynccontextmanager
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp  # opsional, hanya dipakai engine asyncio
+except ImportError:
+    aiohttp = None
+
+try:
+    import lxml.html  # opsional, backend parser HTML yang lebih cepat
+except ImportError:
+    lxml = None
+
+try:
+    from bs4.filter import ElementFilter  # bs4 >= 4.13
+except ImportError:
+    ElementFilter = None
+
+# Menonaktifkan peringatan SSL
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+log = logging.getLogger(__name__)  # lihat dapodik.logs (antrean, json, sampling)
+
+# =========================
+# KONFIGURASI GLOBAL
+# =========================
+BASE_URL = 'https://dapo.kemendikdasmen.go.id'
+SEMESTER_ID = '20251'
+LEVEL_WILAYAH = '0'
+KODE_WILAYAH = '000000'
+REQUEST_TIMEOUT = 10 # detik
+SCHOOL_BASE_URL = 'https://dapo.dikdasmen.go.id'
+ASYNC_CONCURRENCY = 200 # batas request detail sekolah yang berjalan bersamaan (engine asyncio)
+POOL_HOSTS = 2          # dapo.kemendikdasmen.go.id (API) & dapo.dikdasmen.go.id (HTML)
+POOL_MAXSIZE = 20       # koneksi keep-alive maksimal per host
+
+# Batas laju: (request per detik, burst). Setiap request harus dapat token
+# dari bucket host-nya DAN bucket endpoint-nya.
+RATE_LIMITS = {
+    'dapo.kemendikdasmen.go.id': (3.0, 6),
+    'dapo.dikdasmen.go.id': (3.0, 6),
+    'dataSekolah': (1.0, 2),      # daftar provinsi / kota / kecamatan
+    'progresSP': (0.25, 1),       # daftar sekolah per kecamatan
+    'sekolahDetail': (1.5, 3),    # rekap per sekolah
+    'profil': (1.5, 3),           # halaman HTML profil sekolah
+}
+DEFAULT_RATE_LIMIT = (2.0, 4)
+
+# Concurrency adaptif (AIMD): jumlah request bersamaan naik +AIMD_INCREASE per
+# satu window respons bersih, dipotong x AIMD_DECREASE saat anti-bot / 429 / 5xx.
+AIMD_INITIAL = 5
+AIMD_MIN = 1
+AIMD_MAX = ASYNC_CONCURRENCY
+AIMD_INCREASE = 1.0
+AIMD_DECREASE = 0.5
+AIMD_CUT_INTERVAL = 2.0 # detik; satu gelombang error hanya memotong window sekali
+
+# Retry: full-jitter exponential backoff, dibatasi per request dan secara global.
+RETRY_MAX_ATTEMPTS = 8      # percobaan maksimal per request
+RETRY_MAX_DELAY = 60.0      # detik; batas atas backoff
+RETRY_BUDGET_RATIO = 0.2    # retry global maksimal ~20% dari jumlah request baru
+RETRY_BUDGET_MIN_RATE = 0.2 # token retry per detik yang selalu tersedia
+RETRY_BUDGET_CAP = 50       # token retry maksimal yang bisa ditabung
+# 4xx yang masih layak dicoba ulang (403 bisa berupa halaman anti-bot); 4xx lain
+# (400, 404, 410, ...) tidak akan berhasil dengan retry, jadi langsung gagal.
+RETRY_STATUSES = (403, 408, 425, 429)
+
+# Circuit breaker: terbuka setelah BREAKER_THRESHOLD sinyal throttle (anti-bot,
+# timeout, 429, 5xx) dalam BREAKER_WINDOW detik; semua request berhenti selama cooldown.
+BREAKER_THRESHOLD = 5
+BREAKER_WINDOW = 30.0
+BREAKER_COOLDOWN = 60.0
+BREAKER_MAX_COOLDOWN = 900.0 # cooldown berlipat tiap probe gagal, dibatasi nilai ini
+
+# Cache respons HTTP di disk (gzip), kunci = hash(URL + semester).
+# TTL per endpoint dalam detik; 0 = endpoint tidak di-cache.
+CACHE_DIR = os.path.join('cache', 'http')
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_TTL = {
+    'dataSekolah': 14 * 24 * 3600,  # daftar provinsi / kota / kecamatan, jarang berubah dalam satu semester
+    'progresSP': 3 * 24 * 3600,     # daftar sekolah per kecamatan
+    'sekolahDetail': 24 * 3600,
+    'profil': 24 * 3600,
+}
+# Endpoint yang isinya tidak bergantung semester (URL tanpa semester_id): kunci cache
+# tanpa semester, jadi crawl beberapa semester cukup mengunduh halaman profil sekali.
+SEMESTER_AGNOSTIC_ENDPOINTS = ('profil',)
+
+# Indeks hierarki wilayah (provinsi -> kota/kab -> kecamatan) yang disimpan di disk
+REGION_INDEX_FILE = os.path.join('cache', 'wilayah_index.json')
+REGION_INDEX_MAX_AGE = 90 * 24 * 3600 # detik; daftar anak wilayah diambil ulang setelah ini
+
+# Backend parser halaman profil: 'auto' (lxml jika terpasang), 'lxml', atau 'bs4'
+HTML_PARSER = 'auto'
+PARSER_VERIFY_RATE = 0.01 # porsi halaman yang juga diparse bs4 untuk memastikan hasil backend identik
+PARSE_REGIONS = True      # hanya bangun node #profil, .profile-usermenu dan #kontak (fallback ke parse penuh)
+PARSE_CHUNK_SIZE = 64 * 1024 # ukuran potongan HTML per feed pada parse streaming lxml
+RECAP_WORKERS = 32        # thread pengambil rekap sekolahDetail, berjalan paralel dengan unduhan HTML profil
+# Proses parser: thread jaringan hanya mengunduh, parsing + penyusunan baris CSV di
+# ProcessPoolExecutor supaya tidak berebut GIL. None = jumlah core, 0 = parse di thread pengunduh.
+PARSE_PROCESSES = None
+
+# Group commit CSV: writer thread menulis & fsync per batch, bukan per baris.
+# Saat crash, paling banyak CSV_BATCH_ROWS baris / CSV_BATCH_SECONDS detik terakhir hilang (dan di-crawl ulang).
+CSV_BATCH_ROWS = 200
+CSV_BATCH_SECONDS = 2.0
+CSV_RETRY_MAX_SECONDS = 30.0  # backoff maksimum antar percobaan tulis saat file terkunci
+
+
+def build_api_url(base_url: str = BASE_URL,
+                  level_wilayah=LEVEL_WILAYAH,
+                  kode_wilayah: str = KODE_WILAYAH,
+                  semester_id: str = SEMESTER_ID,
+                  sekolah_id: str = None) -> str:
+    """
+    Menyusun URL endpoint rekap sesuai level wilayah / sekolah.
+    Dipakai bersama oleh request_api dan request_api_async.
+    """
+    # cast level ke int kalau bisa, fallback ke value as-is
+    try:
+        lvl = int(level_wilayah) if level_wilayah is not None else 0
+    except ValueError:
+        lvl = level_wilayah
+
+    if lvl == 3 and not sekolah_id:
+        # progresSP untuk level kecamatan
+        return (
+            f'{base_url}/rekap/progresSP?'
+            f'id_level_wilayah={lvl}'
+            f'&kode_wilayah={kode_wilayah}'
+            f'&semester_id={semester_id}'
+            f'&bentuk_pendidikan_id='
+        )
+    if sekolah_id:
+        # detail sekolah (rekap)
+        return (
+            f'{base_url}/rekap/sekolahDetail?'
+            f'semester_id={semester_id}'
+            f'&sekolah_id={sekolah_id}'
+        )
+    # daftar wilayah / sekolah
+    return (
+        f'{base_url}/rekap/dataSekolah?'
+        f'id_level_wilayah={lvl}'
+        f'&kode_wilayah={kode_wilayah}'
+        f'&semester_id={semester_id}'
+    )
+
+
+def school_url(sekolah_id_enkrip: str) -> str:
+    return f"{SCHOOL_BASE_URL}/sekolah/{sekolah_id_enkrip.strip()}"
+
+
+def is_html_body(text: str) -> bool:
+    # API seharusnya balas JSON; HTML berarti halaman anti-bot / error
+    return text.startswith("<!DOCTYPE html") or text.startswith("<html")
+
+
+def is_antibot_page(text: str) -> bool:
+    return "User validation required" in text or "Checking your browser" in text
+
+
+def classify_response(status: int, text: str, expect_json: bool) -> str:
+    """
+    'ok'       : respons bersih
+    'throttle' : server kewalahan / memblokir (anti-bot, 429, 5xx)
+    'neutral'  : lainnya (mis. 404), tidak memengaruhi concurrency
+    """
+    if status == 429 or status >= 500:
+        return 'throttle'
+    if status != 200:
+        return 'neutral'
+    if expect_json and is_html_body(text):
+        return 'throttle'
+    if not expect_json and is_antibot_page(text):
+        return 'throttle'
+    return 'ok'
+
+
+# =========================
+# SESSION HTTP (KEEP-ALIVE, CONNECTION POOL BERSAMA)
+# =========================
+_adapter = None
+_adapter_lock = threading.Lock()
+_thread_local = threading.local()
+
+
+def _shared_adapter() -> HTTPAdapter:
+    global _adapter
+    if _adapter is None:
+        with _adapter_lock:
+            if _adapter is None:
+                # pool_block=True: thread menunggu koneksi bebas, bukan membuka koneksi baru yang lalu dibuang
+                _adapter = HTTPAdapter(pool_connections=POOL_HOSTS,
+                                       pool_maxsize=POOL_MAXSIZE,
+                                       pool_block=True)
+    return _adapter
+
+
+def get_session() -> requests.Session:
+    """
+    Session milik thread pemanggil. Semua session memakai satu HTTPAdapter
+    bersama, jadi koneksi TCP+TLS ke tiap host dipakai ulang lintas thread
+    (ThreadPoolExecutor di skrip part2) tanpa berbagi state Session.
+    """
+    session = getattr(_thread_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = _shared_adapter()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.verify = False
+        _thread_local.session = session
+    return session
+
+
+def session_stats() -> dict:
+    """
+    Statistik per host: koneksi yang dibuka vs request yang memakai ulang
+    koneksi keep-alive. {host: {'opened': n, 'requests': n, 'reused': n}}
+    """
+    stats = {}
+    if _adapter is None:
+        return stats
+    pools = _adapter.poolmanager.pools
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        host = stats.setdefault(pool.host, {'opened': 0, 'requests': 0, 'reused': 0})
+        host['opened'] += pool.num_connections
+        host['requests'] += pool.num_requests
+        host['reused'] += max(pool.num_requests - pool.num_connections, 0)
+    return stats
+
+
+def print_session_stats() -> None:
+    for host, st in session_stats().items():
+        log.info("[POOL] %s: %d request, %d koneksi dibuka, %d reuse", host, st['requests'], st['opened'], st['reused'],
+                 extra={'event': 'pool_stats', 'host': host, **st})
+    if HTTP_CACHE.hits or HTTP_CACHE.misses:
+        log.info("[CACHE] %d hit, %d miss", HTTP_CACHE.hits, HTTP_CACHE.misses,
+                 extra={'event': 'cache_stats', 'hits': HTTP_CACHE.hits, 'misses': HTTP_CACHE.misses})
+    if BREAKER.trips:
+        log.info("[BREAKER] terbuka %d kali, total jeda ~%.0fs", BREAKER.trips, BREAKER.open_seconds,
+                 extra={'event': 'breaker_stats', 'trips': BREAKER.trips, 'open_seconds': BREAKER.open_seconds})
+
+
+# =========================
+# RATE LIMITER (TOKEN BUCKET PER HOST & ENDPOINT)
+# =========================
+def endpoint_of(url: str) -> str:
+    """Nama endpoint untuk bucket rate limit: dataSekolah, progresSP, sekolahDetail, profil."""
+    path = urlsplit(url).path
+    if '/rekap/' in path:
+        return path.rsplit('/', 1)[-1]
+    if '/sekolah/' in path:
+        return 'profil'
+    return 'lainnya'
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Ambil token sekarang (boleh berutang) dan kembalikan berapa detik
+        pemanggil harus menunggu sampai token itu sah. Antrean yang berutang
+        dilayani tepat sesuai laju, tanpa jeda mati saat bucket penuh.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= tokens
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateLimiter:
+    def __init__(self, limits: dict = None, default: tuple = DEFAULT_RATE_LIMIT):
+        self.limits = dict(RATE_LIMITS if limits is None else limits)
+        self.default = default
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                rate, burst = self.limits.get(key, self.default)
+                bucket = self._buckets[key] = TokenBucket(rate, burst)
+            return bucket
+
+    def reserve(self, url: str) -> float:
+        host = urlsplit(url).hostname or ''
+        return max(self.bucket(host).reserve(), self.bucket(endpoint_of(url)).reserve())
+
+    def acquire(self, url: str) -> None:
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, url: str) -> None:
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def drain_seconds(self, counts: dict) -> float:
+        """
+        Waktu minimum (detik) untuk mengirim `counts` = {url contoh: jumlah request}
+        pada laju bucket host & endpoint-nya: bucket paling sibuk yang menentukan.
+        """
+        load = {}
+        for url, n in counts.items():
+            for key in (urlsplit(url).hostname or '', endpoint_of(url)):
+                load[key] = load.get(key, 0) + n
+        return max((n / self.limits.get(key, self.default)[0] for key, n in load.items()), default=0.0)
+
+
+RATE_LIMITER = RateLimiter()
+
+
+# =========================
+# CONCURRENCY ADAPTIF (AIMD)
+# =========================
+class AIMDController:
+    """
+    Membatasi jumlah request yang sedang berjalan. Batasnya (window) naik
+    perlahan selama respons bersih dan dipotong tajam saat server memberi
+    sinyal throttle, sehingga crawl menetap di laju tertinggi yang masih
+    ditoleransi server.
+    """
+
+    def __init__(self,
+                 initial: float = AIMD_INITIAL,
+                 minimum: int = AIMD_MIN,
+                 maximum: int = AIMD_MAX,
+                 increase: float = AIMD_INCREASE,
+                 decrease: float = AIMD_DECREASE,
+                 cut_interval: float = AIMD_CUT_INTERVAL):
+        self.window = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.cut_interval = cut_interval
+        self.in_flight = 0
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self.window))
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self, poll: float = 0.05) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep(poll)
+
+    def release(self, outcome: str = 'neutral') -> None:
+        with self._cond:
+            self.in_flight -= 1
+            old = self.limit
+            if outcome == 'ok':
+                # additive increase: +increase per satu window penuh respons bersih
+                self.window = min(self.maximum, self.window + self.increase / self.window)
+            elif outcome == 'throttle':
+                now = time.monotonic()
+                if now - self._last_cut >= self.cut_interval:
+                    self.window = max(self.minimum, self.window * self.decrease)
+                    self._last_cut = now
+            new = self.limit
+            self._cond.notify_all()
+        if new != old:
+            log.debug("[AIMD] window %d -> %d (%s, in-flight %d)", old, new, outcome, self.in_flight,
+                      extra={'event': 'aimd', 'window': new, 'outcome': outcome})
+
+    @contextmanager
+    def slot(self):
+        """Pemakaian: `with CONCURRENCY.slot() as slot: ...; slot.outcome = 'ok'`."""
+        self.acquire()
+        holder = SimpleNamespace(outcome='neutral')
+        try:
+            yield holder
+        except (requests.Timeout, asyncio.TimeoutError):
+            holder.outcome = 'throttle'
+            raise
+        finally:
+            self.release(holder.outcome)
+
+    @asynccontextmanager
+    async def slot_async(self):
+        await self.acquire_async()
+        holder = SimpleNamespace(outcome='neutral')
+        try:
+            yield holder
+        except asyncio.TimeoutError:
+            holder.outcome = 'throttle'
+            raise
+        finally:
+            self.release(holder.outcome)
+
+
+CONCURRENCY = AIMDController()
+
+
+# =========================
+# CACHE RESPONS HTTP DI DISK (TTL + LRU)
+# =========================
+class HttpCache:
+    """
+    Cache respons di disk. Setiap entri disimpan sebagai file gzip bernama
+    hash(semester|URL), jadi request yang sama dari run berbeda (resume
+    setelah crash, run ulang) tidak perlu ke jaringan lagi selama TTL
+    endpoint-nya belum lewat. Ukuran total dibatasi `max_bytes`; entri
+    yang paling lama tidak dipakai dihapus lebih dulu (LRU, pakai mtime).
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, ttl: dict = None, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = dict(CACHE_TTL if ttl is None else ttl)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index = None  # OrderedDict key -> ukuran file, urut dari yang paling lama tidak dipakai
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.gz')
+
+    @staticmethod
+    def key(url: str, semester_id: str) -> str:
+        if endpoint_of(url) in SEMESTER_AGNOSTIC_ENDPOINTS:
+            semester_id = ''
+        return hashlib.sha256(f"{semester_id}|{url}".encode('utf-8')).hexdigest()
+
+    def _load_index(self) -> None:
+        entries = []
+        if os.path.isdir(self.directory):
+            for sub in os.scandir(self.directory):
+                if not sub.is_dir():
+                    continue
+                for entry in os.scandir(sub.path):
+                    if entry.name.endswith('.gz'):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, entry.name[:-3], st.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total = sum(size for _, _, size in entries)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._total > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, url: str, semester_id: str = SEMESTER_ID):
+        """Body respons (str) jika ada dan belum kedaluwarsa, selain itu None."""
+        ttl = self.ttl.get(endpoint_of(url), 0)
+        if not ttl:
+            return None
+        key = self.key(url, semester_id)
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+            if time.time() - entry['fetched_at'] > ttl:
+                with self._lock:
+                    self.misses += 1
+                return None
+            os.utime(path)  # tandai baru dipakai (LRU lintas run)
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry['body']
+
+    def put(self, url: str, body: str, semester_id: str = SEMESTER_ID) -> None:
+        if not self.ttl.get(endpoint_of(url), 0):
+            return
+        key = self.key(url, semester_id)
+        path = self._path(key)
+        entry = {'url': url, 'semester_id': semester_id, 'fetched_at': time.time(), 'body': body}
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            # gagal menyiapkan folder cache tidak boleh menggagalkan request yang sudah berhasil
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            log.warning("[CACHE] Gagal menulis cache untuk %s: %s", url, e, extra={'event': 'cache_error', 'url': url})
+            return
+        with self._lock:
+            if self._index is None:
+                self._load_index()
+            self._total += size - self._index.pop(key, 0)
+            self._index[key] = size
+            self._evict()
+
+
+HTTP_CACHE = HttpCache()
+
+
+# =========================
+# CIRCUIT BREAKER (JEDA GLOBAL SAAT ANTI-BOT)
+# =========================
+class CircuitBreaker:
+    """
+    closed    : request berjalan normal
+    open      : semua worker menunggu sampai cooldown selesai
+    half-open : hanya satu request percobaan (probe) yang dikirim; jika lolos
+                breaker tertutup, jika kena throttle lagi breaker terbuka
+                dengan cooldown dua kali lipat
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self,
+                 threshold: int = BREAKER_THRESHOLD,
+                 window: float = BREAKER_WINDOW,
+                 cooldown: float = BREAKER_COOLDOWN,
+                 max_cooldown: float = BREAKER_MAX_COOLDOWN):
+        self.threshold = threshold
+        self.window = window
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self.open_seconds = 0.0
+        self._failures = deque()
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def poll(self):
+        """None jika request boleh jalan sekarang, selain itu lama tunggu (detik)."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return None
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.cooldown - time.monotonic()
+                if remaining > 0:
+                    return remaining
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if not self._probe_in_flight:
+                self._probe_in_flight = True
+                log.info("[BREAKER] half-open: kirim 1 request percobaan...", extra={'event': 'breaker', 'state': 'half-open'})
+                return None
+            return 1.0
+
+    def wait(self) -> None:
+        while (delay := self.poll()) is not None:
+            time.sleep(delay)
+
+    async def wait_async(self) -> None:
+        while (delay := self.poll()) is not None:
+            await asyncio.sleep(delay)
+
+    def _open(self, now: float) -> None:
+        self.state = self.OPEN
+        self.opened_at = now
+        self.trips += 1
+        self.open_seconds += self.cooldown
+        self._failures.clear()
+        log.warning("[BREAKER] OPEN: semua request dijeda %.0fs (anti-bot / timeout beruntun)", self.cooldown,
+                    extra={'event': 'breaker', 'state': 'open', 'cooldown': self.cooldown})
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                if outcome == 'throttle':
+                    self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                    self._open(now)
+                else:
+                    self.state = self.CLOSED
+                    self.cooldown = self.base_cooldown
+                    self._failures.clear()
+                    log.info("[BREAKER] CLOSED: server normal kembali, lanjut crawl.", extra={'event': 'breaker', 'state': 'closed'})
+                return
+            if self.state == self.OPEN or outcome != 'throttle':
+                return
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.window:
+                self._failures.popleft()
+            if len(self._failures) >= self.threshold:
+                self._open(now)
+
+    @contextmanager
+    def observe(self, slot):
+        """Catat hasil satu request (slot dari CONCURRENCY.slot) ke breaker."""
+        try:
+            yield
+        except (requests.Timeout, asyncio.TimeoutError):
+            slot.outcome = 'throttle'
+            raise
+        finally:
+            self.record(slot.outcome)
+
+
+BREAKER = CircuitBreaker()
+
+
+# =========================
+# RETRY POLICY & RETRY BUDGET
+# =========================
+class RetryExhausted(Exception):
+    """
+    Request tetap gagal setelah batas percobaan atau budget retry global habis.
+    `transient` True hanya jika berhenti karena budget retry habis (server
+    sedang bermasalah, layak dicoba lagi nanti); False jika batas percobaan
+    request sudah habis atau respons 4xx permanen (lihat RETRY_STATUSES).
+    """
+
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
+
+def is_permanent_status(status) -> bool:
+    """Status 4xx yang tidak akan berhasil dengan retry (404, 400, ...)."""
+    return status is not None and 400 <= status < 500 and status not in RETRY_STATUSES
+
+
+class RetryBudget:
+    """
+    Budget retry global: setiap request baru menabung `ratio` token, ditambah
+    `min_rate` token/detik. Setiap retry memakai satu token. Saat server down,
+    token cepat habis sehingga semua worker berhenti retry bersamaan alih-alih
+    membanjiri server.
+    """
+
+    def __init__(self,
+                 ratio: float = RETRY_BUDGET_RATIO,
+                 min_rate: float = RETRY_BUDGET_MIN_RATE,
+                 cap: float = RETRY_BUDGET_CAP):
+        self.ratio = ratio
+        self.min_rate = min_rate
+        self.cap = cap
+        self.tokens = float(cap)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.cap, self.tokens + (now - self.updated) * self.min_rate)
+        self.updated = now
+
+    def on_request(self) -> None:
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.cap, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class RetryPolicy:
+    def __init__(self,
+                 max_attempts: int = RETRY_MAX_ATTEMPTS,
+                 max_delay: float = RETRY_MAX_DELAY,
+                 budget: RetryBudget = None):
+        self.max_attempts = max_attempts
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def backoff(self, attempt: int, base_delay: float) -> float:
+        # full jitter: acak di [0, min(cap, base * 2^(attempt-1))] supaya worker tidak retry serempak
+        return random.uniform(0, min(self.max_delay, base_delay * (2 ** (attempt - 1))))
+
+    def attempts_left(self, attempt: int, max_attempts: int = None) -> bool:
+        return attempt < (max_attempts or self.max_attempts)
+
+    def next_delay(self, attempt: int, base_delay: float, max_attempts: int = None):
+        """Jeda sebelum percobaan berikutnya, atau None jika tidak boleh retry lagi."""
+        if not self.attempts_left(attempt, max_attempts):
+            return None
+        if self.budget is not None and not self.budget.try_spend():
+            return None
+        return self.backoff(attempt, base_delay)
+
+
+RETRY_BUDGET = RetryBudget()
+RETRY_POLICY = RetryPolicy(budget=RETRY_BUDGET)
+
+
+# =========================
+# REQUEST API (RETRY TERBATAS)
+# =========================
+def request_api(base_url: str = BASE_URL,
+                level_wilayah=LEVEL_WILAYAH,
+                kode_wilayah: str = KODE_WILAYAH,
+                semester_id: str = SEMESTER_ID,
+                sekolah_id: str = None,
+                backoff: float = 0.5,
+                max_attempts: int = None) -> dict:
+    """
+    Wrapper untuk semua endpoint rekap API dapo.
+    Retry dengan full-jitter backoff (basis `backoff` detik) sampai
+    RETRY_POLICY habis, lalu raise RetryExhausted.
+    """
+    url = build_api_url(base_url, level_wilayah, kode_wilayah, semester_id, sekolah_id)
+    cached = HTTP_CACHE.get(url, semester_id)
+    if cached is not None:
+        return json.loads(cached)
+
+    RETRY_BUDGET.on_request()
+    attempt = 0
+    while True:
+        attempt += 1
+        status = None
+        try:
+            BREAKER.wait()
+            RATE_LIMITER.acquire(url)
+            log.debug("[API] GET %s", url, extra={'event': 'request', 'url': url})
+            with CONCURRENCY.slot() as slot, BREAKER.observe(slot):
+                res = get_session().get(url, timeout=REQUEST_TIMEOUT)
+                status = res.status_code
+                text = res.text.strip()
+                slot.outcome = classify_response(status, text, expect_json=True)
+
+            if status != 200:
+                reason = f"HTTP {status}"
+            elif is_html_body(text):
+                reason = "Server balas HTML (kemungkinan anti-bot)"
+            else:
+                data = res.json()
+                HTTP_CACHE.put(url, text, semester_id)
+                return data
+
+        except Exception as e:
+            reason = f"ERROR {e}"
+
+        if is_permanent_status(status):
+            raise RetryExhausted(f"{reason} untuk {url} (tidak dicoba ulang)")
+        delay = RETRY_POLICY.next_delay(attempt, backoff, max_attempts)
+        if delay is None:
+            raise RetryExhausted(f"{reason} untuk {url} (menyerah setelah {attempt} percobaan)",
+                                 transient=RETRY_POLICY.attempts_left(attempt, max_attempts))
+        log.warning("[API] %s untuk %s, retry ke-%d dalam %.1fs...", reason, url, attempt, delay,
+                    extra={'event': 'retry', 'url': url, 'attempt': attempt})
+        time.sleep(delay)
+
+
+# =========================
+# REQUEST HTML (RETRY TERBATAS)
+# =========================
+def request_html(url: str, backoff: float = 0.5, max_attempts: int = None,
+                 semester_id: str = SEMESTER_ID) -> str:
+    # *** ISI FUNGSI request_html() Anda di sini ***
+    if not url.startswith('http'):
+        raise ValueError(f"Invalid URL: {url}")
+
+    cached = HTTP_CACHE.get(url, semester_id)
+    if cached is not None:
+        return cached
+
+    RETRY_BUDGET.on_request()
+    attempt = 0
+    while True:
+        attempt += 1
+        status = None
+        try:
+            BREAKER.wait()
+            RATE_LIMITER.acquire(url)
+            log.debug("[HTML] GET %s", url, extra={'event': 'request', 'url': url})
+            with CONCURRENCY.slot() as slot, BREAKER.observe(slot):
+                res = get_session().get(url, timeout=REQUEST_TIMEOUT)
+                status = res.status_code
+                text = res.text
+                slot.outcome = classify_response(status, text, expect_json=False)
+
+            if status != 200:
+                reason = f"HTTP {status}"
+            elif is_antibot_page(text):
+                reason = "User validation / anti-bot"
+            else:
+                HTTP_CACHE.put(url, text, semester_id)
+                return text
+
+        except requests.RequestException as e:
+            reason = f"Network: {e}"
+        except Exception as e:
+            reason = f"Other: {e}"
+
+        if is_permanent_status(status):
+            raise RetryExhausted(f"{reason} untuk {url} (tidak dicoba ulang)")
+        delay = RETRY_POLICY.next_delay(attempt, backoff, max_attempts)
+        if delay is None:
+            raise RetryExhausted(f"{reason} untuk {url} (menyerah setelah {attempt} percobaan)",
+                                 transient=RETRY_POLICY.attempts_left(attempt, max_attempts))
+        log.warning("[HTML] %s untuk %s, retry ke-%d dalam %.1fs...", reason, url, attempt, delay,
+                    extra={'event': 'retry', 'url': url, 'attempt': attempt})
+        time.sleep(delay)
+
+
+# =========================
+# INDEKS WILAYAH (PROVINSI -> KOTA/KAB -> KECAMATAN)
+# =========================
+_WILAYAH_PREFIXES = (
+    ('PROVINSI ', ''), ('PROV ', ''),
+    ('KABUPATEN ', 'KAB '),
+    ('KECAMATAN ', ''), ('KEC ', ''),
+)
+
+
+def normalize_wilayah_name(name: str) -> str:
+    """
+    Samakan penulisan nama wilayah untuk pencarian:
+    'Prov. Jawa Barat' -> 'JAWA BARAT', 'Kabupaten Bekasi' / 'Kab. Bekasi' -> 'KAB BEKASI',
+    'Kota Depok' -> 'KOTA DEPOK', 'Kec. Pancoran Mas' -> 'PANCORAN MAS',
+    'Prov. D.K.I. Jakarta' -> 'DKI JAKARTA'.
+    """
+    n = re.sub(r'\s+', ' ', name.upper().replace('.', ' ')).strip()
+    n = re.sub(r'\b(\w) (?=\w\b)', r'\1', n)  # 'D K I JAKARTA' -> 'DKI JAKARTA'
+    for prefix, repl in _WILAYAH_PREFIXES:
+        if n.startswith(prefix):
+            n = repl + n[len(prefix):]
+            break
+    return n
+
+
+class RegionIndex:
+    """
+    Indeks wilayah yang disimpan di REGION_INDEX_FILE. Anak dari suatu wilayah
+    hanya diambil dari API saat pertama kali dibutuhkan; run berikutnya untuk
+    target yang sama tidak mengirim request hierarki sama sekali.
+
+    Setiap node: {'nama', 'kode_wilayah', 'id_level_wilayah', 'parent', 'jumlah_sekolah'};
+    jumlah_sekolah = kolom angka baris dataSekolah (mis. sd, smp, sd_n, sd_s),
+    dipakai planner untuk memperkirakan beban crawl tanpa request tambahan.
+    """
+
+    def __init__(self,
+                 path: str = REGION_INDEX_FILE,
+                 semester_id: str = SEMESTER_ID,
+                 max_age: float = REGION_INDEX_MAX_AGE):
+        self.path = path
+        self.semester_id = semester_id
+        self.max_age = max_age
+        self.nodes = {}
+        self.expanded = {}  # kode_wilayah -> {'fetched_at': ts, 'children': [kode, ...]}
+        self.requests = 0
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.nodes = data.get('nodes', {})
+            self.expanded = data.get('expanded', {})
+        except (OSError, ValueError) as e:
+            log.warning("[WILAYAH] Indeks rusak, dibangun ulang: %s", e)
+            self.nodes, self.expanded = {}, {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'nodes': self.nodes, 'expanded': self.expanded}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def get(self, kode_wilayah: str):
+        return self.nodes.get(kode_wilayah.strip())
+
+    def children(self, kode_wilayah: str = KODE_WILAYAH, refresh: bool = False) -> list:
+        """
+        Daftar anak wilayah (level 0 = semua provinsi). Diambil dari API hanya
+        jika belum ada di indeks, sudah kedaluwarsa, atau `refresh`.
+        """
+        kode_wilayah = kode_wilayah.strip()
+        with self._lock:
+            entry = self.expanded.get(kode_wilayah)
+            if refresh or entry is None or time.time() - entry['fetched_at'] > self.max_age:
+                node = self.nodes.get(kode_wilayah)
+                level = node['id_level_wilayah'] if node else LEVEL_WILAYAH
+                if int(level) >= 3:
+                    raise ValueError(f"{kode_wilayah} adalah kecamatan; daftar sekolah tidak disimpan di indeks wilayah")
+                rows = request_api(level_wilayah=level, kode_wilayah=kode_wilayah,
+                                   semester_id=self.semester_id, backoff=3)
+                self.requests += 1
+                kids = []
+                for row in rows:
+                    kode = row['kode_wilayah'].strip()
+                    self.nodes[kode] = {
+                        'nama': row['nama'],
+                        'kode_wilayah': kode,
+                        'id_level_wilayah': row['id_level_wilayah'],
+                        'parent': kode_wilayah,
+                        'jumlah_sekolah': {key: value for key, value in row.items()
+                                           if isinstance(value, (int, float)) and key != 'id_level_wilayah'},
+                    }
+                    kids.append(kode)
+                entry = self.expanded[kode_wilayah] = {'fetched_at': time.time(), 'children': kids}
+                self.save()
+            return [self.nodes[k] for k in entry['children']]
+
+    def find(self, name: str, parent: str = None, level: int = None):
+        """
+        Cari wilayah berdasarkan nama (dinormalisasi) atau kode_wilayah.
+        `parent` (nama atau kode wilayah induk) mempersempit pencarian; tanpa
+        `parent`, hierarki ditelusuri dari level 0 sampai `level` (default 2).
+        """
+        node = self.get(name)
+        if node:
+            return node
+
+        if parent is not None:
+            parent_node = self.get(parent) or self.find(parent)
+            if parent_node is None:
+                return None
+            scopes, max_level = [parent_node['kode_wilayah']], int(parent_node['id_level_wilayah']) + 1
+        else:
+            scopes, max_level = [KODE_WILAYAH], 2 if level is None else level
+
+        target = normalize_wilayah_name(name)
+        while scopes:
+            next_scopes = []
+            for kode in scopes:
+                for child in self.children(kode):
+                    child_level = int(child['id_level_wilayah'])
+                    if normalize_wilayah_name(child['nama']) == target and (level is None or child_level == int(level)):
+                        return child
+                    if child_level < max_level:
+                        next_scopes.append(child['kode_wilayah'])
+            scopes = next_scopes
+        return None
+
+
+# =========================
+# CSV RELATED (KONSTANTA & FUNGSI)
+# =========================
+CSV_HEADERS = [
+    'sekolah_id_enkrip', 'Nama_Sekolah', 'Provinsi', 'Kota_Kabupaten', 'Kecamatan',
+    'NPSN', 'Status', 'Bentuk_Pendidikan', 'Status_Kepemilikan',
+    'SK_Pendirian_Sekolah', 'Tanggal_SK_Pendirian', 'SK_Izin_Operasional',
+    'Tanggal_SK_Izin_Operasional', 'Kebutuhan_Khusus_Dilayani', 'Nama_Bank',
+    'Cabang_KCP_Unit', 'Rekening_Atas_Nama', 'Status_BOS',
+    'Waktu_Penyelenggaraan', 'Sertifikasi_ISO', 'Sumber_Listrik',
+    'Daya_Listrik', 'Kecepatan_Internet', 'Kepsek', 'Operator',
+    'Akreditasi', 'Kurikulum', 'Waktu', 'Alamat', 'RT_RW',
+    'Dusun', 'Desa_Kelurahan', 'Kode_Pos', 'Lintang', 'Bujur',
+    'Guru_L', 'Guru_P', 'Guru_Total',
+    'Tendik_L', 'Tendik_P', 'Tendik_Total',
+    'PTK_L', 'PTK_P', 'PTK_Total',
+    'Peserta_Didik_L', 'Peserta_Didik_P', 'Peserta_Didik_Total',
+    'Ruang_Kelas', 'Ruang_Perpus', 'Ruang_Lab', 'Ruang_Pratik',
+    'Rombel'
+]
+
+def create_csv_header(filename: str, columns=None) -> None:
+    # *** ISI FUNGSI create_csv_header() Anda di sini ***
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    if os.path.exists(filename):
+        return
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(columns or CSV_HEADERS)
+
+
+def read_csv_header(filename: str) -> list:
+    """Header CSV yang sudah ada (None jika file belum ada / kosong)."""
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        return next(csv.reader(csvfile), None)
+
+
+def align_csv_row(values: list, header: list) -> list:
+    """
+    Baris CSV dengan `header` apa pun -> urutan CSV_HEADERS. CSV lama bisa punya
+    header lebih pendek dari barisnya (kolom ditambah belakangan), CSV proyeksi
+    'omit' hanya memuat sebagian kolom; kolom yang tidak ada diisi ''.
+    """
+    if header == CSV_HEADERS[:len(header)]:
+        return values[:len(CSV_HEADERS)] + [''] * (len(CSV_HEADERS) - len(values))
+    index = {column: i for i, column in enumerate(header)}
+    return [values[index[column]] if index.get(column, len(values)) < len(values) else ''
+            for column in CSV_HEADERS]
+
+
+def load_processed_ids(filename: str) -> set:
+    # *** ISI FUNGSI load_processed_ids() Anda di sini ***
+    processed = set()
+    if not os.path.exists(filename):
+        return processed
+    with open(filename, 'r', newline='', encoding='utf-8') as csvfile:
+        try:
+            reader = csv.DictReader(csvfile)
+            for row in reader:
+                sid = row.get('sekolah_id_enkrip')
+                if sid:
+                    processed.add(sid.strip())
+        except Exception:
+            log.warning("[CSV] Gagal membaca CSV (mungkin kosong atau header error).")
+            pass
+    return processed
+
+
+def build_csv_row(sekolah_id_enkrip: str,
+                  school_data: dict,
+                  school_name: str,
+                  province: str,
+                  kota: str,
+                  kecamatan: str) -> list:
+    """Satu baris CSV (urutan CSV_HEADERS) dari hasil parse_html."""
+    profile = school_data.get('profile', {})
+    contact = school_data.get('contact', {})
+    recapitulation = school_data.get('recapitulation', {})
+    identitas = profile.get('identitas_sekolah', {})
+    pelengkap = profile.get('data_pelengkap', {})
+    rinci = profile.get('data_rinci', {})
+    sidebar = profile.get('sidebar_info', {})
+
+    Guru_L = recapitulation.get('ptk_laki', 0); Guru_P = recapitulation.get('ptk_perempuan', 0); Guru_Total = Guru_L + Guru_P
+    Tendik_L = recapitulation.get('pegawai_laki', 0); Tendik_P = recapitulation.get('pegawai_perempuan', 0); Tendik_Total = Tendik_L + Tendik_P
+    PTK_L = Guru_L + Tendik_L; PTK_P = Guru_P + Tendik_P; PTK_Total = PTK_L + PTK_P
+    PD_L = recapitulation.get('pd_laki', 0); PD_P = recapitulation.get('pd_perempuan', 0); PD_Total = PD_L + PD_P
+    ruang_kelas = recapitulation.get('after_ruang_kelas', recapitulation.get('before_ruang_kelas', 0))
+    ruang_perpus = recapitulation.get('after_ruang_perpus', recapitulation.get('before_ruang_perpus', 0))
+    ruang_lab = recapitulation.get('after_ruang_lab', recapitulation.get('before_ruang_lab', 0))
+    ruang_pratik = recapitulation.get('after_ruang_praktik', recapitulation.get('before_ruang_praktik', 0))
+
+    row = [
+        sekolah_id_enkrip, school_name, province, kota, kecamatan, identitas.get('NPSN', ''), identitas.get('Status', ''), identitas.get('Bentuk Pendidikan', ''), identitas.get('Status Kepemilikan', ''),
+        identitas.get('SK Pendirian Sekolah', ''), identitas.get('Tanggal SK Pendirian', ''), identitas.get('SK Izin Operasional', ''), identitas.get('Tanggal SK Izin Operasional', ''),
+        pelengkap.get('Kebutuhan Khusus Dilayani', ''), pelengkap.get('Nama Bank', ''), pelengkap.get('Cabang KCP/Unit', ''), pelengkap.get('Rekening Atas Nama', ''), rinci.get('Status BOS', ''),
+        rinci.get('Waku Penyelenggaraan', ''), rinci.get('Sertifikasi ISO', ''), rinci.get('Sumber Listrik', ''), rinci.get('Daya Listrik', ''), rinci.get('Kecepatan Internet', ''),
+        sidebar.get('Kepsek', ''), sidebar.get('Operator', ''), sidebar.get('Akreditasi', ''), sidebar.get('Kurikulum', ''), sidebar.get('Waktu', ''), contact.get('Alamat', ''),
+        contact.get('RT / RW', ''), contact.get('Dusun', ''), contact.get('Desa / Kelurahan', ''), contact.get('Kode Pos', ''), contact.get('Lintang', ''), contact.get('Bujur', ''),
+        Guru_L, Guru_P, Guru_Total, Tendik_L, Tendik_P, Tendik_Total, PTK_L, PTK_P, PTK_Total, PD_L, PD_P, PD_Total,
+        ruang_kelas, ruang_perpus, ruang_lab, ruang_pratik, recapitulation.get('rombel', 0)
+    ]
+    return row
+
+
+# =========================
+# PROYEKSI KOLOM (LISTING vs DETAIL)
+# =========================
+# Baris listing progresSP per kecamatan sudah memuat agregat per sekolah.
+# Jika semua kolom yang diminta ada di sini, baris output diisi dari
+# listing saja: satu request per kecamatan, tanpa profil & sekolahDetail.
+IDENTITY_COLUMNS = CSV_HEADERS[:5] # id, nama & wilayah: selalu diketahui dari listing + indeks wilayah
+LISTING_COLUMNS = {                # kolom CSV -> key baris listing progresSP
+    'NPSN': 'npsn',
+    'Status': 'status_sekolah',
+    'Bentuk_Pendidikan': 'bentuk_pendidikan',
+    'Guru_Total': 'ptk',
+    'Tendik_Total': 'pegawai',
+    'Peserta_Didik_Total': 'pd',
+    'Ruang_Kelas': 'jml_rk',
+    'Ruang_Perpus': 'jml_perpus',
+    'Ruang_Lab': 'jml_lab',
+    'Rombel': 'rombel',
+}
+LISTING_DERIVED = {'PTK_Total': ('Guru_Total', 'Tendik_Total')} # dijumlahkan dari kolom listing lain
+DETAIL_SOURCES = ('profil', 'sekolahDetail') # endpoint per sekolah (nama sama dengan endpoint_of)
+PROFILE_COLUMNS = CSV_HEADERS[CSV_HEADERS.index('NPSN'):CSV_HEADERS.index('Guru_L')] # halaman profil (parse_html)
+RECAP_COLUMNS = CSV_HEADERS[CSV_HEADERS.index('Guru_L'):]                           # rekap sekolahDetail
+COLUMN_SOURCES = {**{column: 'profil' for column in PROFILE_COLUMNS},
+                  **{column: 'sekolahDetail' for column in RECAP_COLUMNS}}
+PROJECTIONS = ('empty', 'omit')
+PROJECTION = 'empty' # kolom yang tidak diminta: 'empty' dikosongkan, 'omit' tidak ditulis sama sekali
+
+
+def select_columns(columns=None) -> list:
+    """
+    Kolom output yang diminta, urut CSV_HEADERS. None -> semua kolom;
+    'listing' -> semua kolom yang tersedia di listing. Boleh dipisah koma.
+    """
+    if not columns:
+        return list(CSV_HEADERS)
+    if isinstance(columns, str):
+        columns = [columns]
+    requested = set()
+    for value in columns:
+        for column in str(value).split(','):
+            column = column.strip()
+            if column == 'listing':
+                requested.update(IDENTITY_COLUMNS, LISTING_COLUMNS, LISTING_DERIVED)
+            elif column in CSV_HEADERS:
+                requested.add(column)
+            elif column:
+                raise ValueError(f"Kolom '{column}' tidak dikenal (pilihan: listing, {', '.join(CSV_HEADERS)})")
+    # id, nama & wilayah selalu ikut: tanpa biaya request, dan id jadi dasar resume & upsert
+    requested.update(IDENTITY_COLUMNS)
+    return [column for column in CSV_HEADERS if column in requested]
+
+
+def detail_sources(columns) -> tuple:
+    """
+    Endpoint per sekolah yang dibutuhkan kolom `columns` (urut DETAIL_SOURCES);
+    kolom yang ada di listing tidak butuh endpoint. () jika listing sudah cukup.
+    """
+    if len(columns) == len(CSV_HEADERS):
+        return DETAIL_SOURCES
+    from_listing = set(IDENTITY_COLUMNS) | set(LISTING_COLUMNS) | set(LISTING_DERIVED)
+    needed = {COLUMN_SOURCES[column] for column in columns if column not in from_listing}
+    return tuple(source for source in DETAIL_SOURCES if source in needed)
+
+
+def project_row(row: list, columns, sources=DETAIL_SOURCES, listing_row: list = None) -> list:
+    """
+    Baris akhir (tetap urut & sepanjang CSV_HEADERS): kolom yang endpoint-nya
+    tidak diambil (`sources`) diisi dari `listing_row`, kolom yang tidak
+    diminta dikosongkan.
+    """
+    if len(columns) == len(CSV_HEADERS):
+        return row
+    selected = set(columns)
+    projected = []
+    for index, column in enumerate(CSV_HEADERS):
+        if column not in selected:
+            projected.append('')
+        elif listing_row is not None and COLUMN_SOURCES.get(column) not in sources:
+            projected.append(listing_row[index])
+        else:
+            projected.append(row[index])
+    return projected
+
+
+def build_listing_row(sekolah: dict, province: str, kota: str, kecamatan: str) -> list:
+    """Satu baris CSV (urutan CSV_HEADERS) dari baris listing saja; kolom detail dikosongkan."""
+    values = dict(zip(IDENTITY_COLUMNS, (sekolah['sekolah_id_enkrip'].strip(), sekolah.get('nama', ''),
+                                         province, kota, kecamatan)))
+    for column, key in LISTING_COLUMNS.items():
+        value = sekolah.get(key)
+        values[column] = '' if value is None else value
+    for column, parts in LISTING_DERIVED.items():
+        if all(isinstance(values[part], (int, float)) for part in parts):
+            values[column] = sum(values[part] for part in parts)
+    return [values.get(column, '') for column in CSV_HEADERS]
+
+
+_csv_lock = threading.Lock()
+
+
+def append_to_csv(filename: str,
+                  sekolah_id_enkrip: str,
+                  school_data: dict,
+                  school_name: str,
+                  province: str,
+                  kota: str,
+                  kecamatan: str) -> bool:
+    """
+    Tulis satu baris langsung (open + fsync per baris). Untuk crawl besar
+    pakai CsvWriter / get_csv_writer() yang melakukan group commit.
+    """
+    row = build_csv_row(sekolah_id_enkrip, school_data, school_name, province, kota, kecamatan)
+
+    try:
+        with _csv_lock, open(filename, 'a', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(row)
+            csvfile.flush()
+            os.fsync(csvfile.fileno()) 
+        return True
+    except PermissionError:
+        log.error("🚨 ERROR TULIS CSV: Gagal menulis ke '%s'. File MUNGKIN SEDANG TERBUKA DI APLIKASI LAIN. Data ini dilewati.", filename)
+        return False
+    except Exception as e:
+        log.error("🚨 ERROR TULIS CSV: Error tak terduga: %s. Data ini dilewati.", e)
+        return False
+
+
+def repair_csv_tail(filename: str) -> int:
+    """
+    Buang baris terakhir yang terpotong (file tidak diakhiri newline, mis.
+    crash di tengah write). Mengembalikan jumlah byte yang dibuang.
+    """
+    if not os.path.exists(filename):
+        return 0
+    with open(filename, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return 0
+        # cari newline terakhir dari belakang per blok
+        pos = size
+        while pos > 0:
+            start = max(0, pos - 65536)
+            f.seek(start)
+            cut = f.read(pos - start).rfind(b'\n')
+            if cut != -1:
+                keep = start + cut + 1
+                break
+            pos = start
+        else:
+            keep = 0
+        f.truncate(keep)
+        f.flush()
+        os.fsync(f.fileno())
+    log.warning("[CSV] Baris terpotong di akhir %s dibuang (%d byte).", filename, size - keep)
+    return size - keep
+
+
+class CsvWriter:
+    """
+    Writer CSV dengan satu thread penulis (group commit). Worker hanya
+    memasukkan baris ke antrean; thread penulis menulis satu batch sekaligus
+    (satu write() per batch, jadi baris tidak pernah saling menyisip) dan
+    fsync setiap `batch_rows` baris atau `batch_seconds` detik.
+    `on_commit(rows)` (opsional) dipanggil dari thread penulis setelah
+    baris-baris itu di-fsync, mis. untuk menandai 'done' di jurnal crawl.
+    Baris selalu urut CSV_HEADERS; `columns` (proyeksi 'omit') membatasi
+    kolom yang ditulis. Header file yang sudah ada selalu diikuti.
+    """
+
+    def __init__(self, filename: str, batch_rows: int = CSV_BATCH_ROWS, batch_seconds: float = CSV_BATCH_SECONDS,
+                 columns=None):
+        self.filename = filename
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_seconds
+        self.rows_written = 0
+        self.fsyncs = 0
+        self.on_commit = None
+        self._queue = queue.Queue()
+        self._closed = False
+        create_csv_header(filename, columns)
+        self.columns = read_csv_header(filename) or list(CSV_HEADERS)
+        if columns and self.columns != list(columns):
+            log.warning("[CSV] %s sudah memakai header %d kolom; kolom mengikuti header file.", filename, len(self.columns))
+        # posisi tiap kolom file di baris CSV_HEADERS (None -> kolom tak dikenal, ditulis kosong)
+        self._indexes = None if self.columns == CSV_HEADERS else [
+            CSV_HEADERS.index(column) if column in CSV_HEADERS else None for column in self.columns]
+        repair_csv_tail(filename)
+        self._thread = threading.Thread(target=self._run, name=f"csv-writer:{os.path.basename(filename)}", daemon=True)
+        self._thread.start()
+
+    def append(self,
+               sekolah_id_enkrip: str,
+               school_data: dict,
+               school_name: str,
+               province: str,
+               kota: str,
+               kecamatan: str) -> bool:
+        """Argumen sama dengan append_to_csv (tanpa filename). Baris durable paling lambat batch_seconds kemudian."""
+        return self.write_row(build_csv_row(sekolah_id_enkrip, school_data, school_name, province, kota, kecamatan))
+
+    def write_row(self, row: list) -> bool:
+        if self._closed or not self._thread.is_alive():
+            log.error("🚨 ERROR TULIS CSV: writer '%s' sudah ditutup / berhenti. Data ini dilewati.", self.filename)
+            return False
+        self._queue.put(row)
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """Tunggu sampai semua baris yang sudah masuk antrean tertulis dan di-fsync."""
+        if self._closed or not self._thread.is_alive():
+            return False # thread penulis sudah berhenti, event tidak akan pernah di-set
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        try:
+            self._loop()
+        except Exception:
+            # write_row() melihat thread mati dan mengembalikan False, baris tidak hilang diam-diam
+            log.exception("🚨 ERROR TULIS CSV: writer '%s' berhenti.", self.filename)
+
+    def _loop(self):
+        pending = []  # baris yang sudah ditulis ke file tapi belum di-fsync
+        buffered = [] # baris yang belum ditulis (gagal tulis, dicoba lagi)
+        last_sync = time.monotonic() # awal batch yang belum di-fsync
+        retry_at = 0.0 # setelah gagal tulis / fsync, percobaan berikutnya ditunda (backoff berlipat)
+        backoff = 0.0
+        with open(self.filename, 'a', newline='', encoding='utf-8') as csvfile:
+            while True:
+                # buffered tidak kosong di sini hanya jika tulis terakhir gagal -> tunggu retry_at
+                deadlines = ([max(last_sync + self.batch_seconds, retry_at)] if pending else []) + \
+                            ([retry_at] if buffered else [])
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = False
+                waiters = []
+                stop = item is None
+                if isinstance(item, list):
+                    buffered.append(item)
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                # ambil semua yang sudah menunggu di antrean tanpa blocking
+                while not stop and len(buffered) < self.batch_rows:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        buffered.append(item)
+
+                ready = stop or waiters or time.monotonic() >= retry_at
+                failed = False
+                if buffered and ready:
+                    if self._write(csvfile, buffered):
+                        if not pending:
+                            last_sync = time.monotonic() # batch baru dimulai
+                        pending.extend(buffered)
+                        buffered = []
+                    else:
+                        failed = True
+
+                due = time.monotonic() - last_sync >= self.batch_seconds
+                if pending and ready and not failed and (stop or waiters or due or len(pending) >= self.batch_rows):
+                    # ENOSPC / EIO biasanya baru muncul di sini (write() text-mode di-buffer);
+                    # pending disimpan dan fsync dicoba lagi dengan backoff yang sama
+                    if self._sync(csvfile):
+                        self.rows_written += len(pending)
+                        self.fsyncs += 1
+                        self._commit(pending)
+                        pending = []
+                    else:
+                        failed = True
+                if failed:
+                    backoff = min(backoff * 2 or max(self.batch_seconds, 0.5), CSV_RETRY_MAX_SECONDS)
+                    retry_at = time.monotonic() + backoff
+                elif ready:
+                    backoff = 0.0
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    if buffered or pending:
+                        log.error("🚨 ERROR TULIS CSV: %d baris gagal ditulis ke '%s'.", len(buffered) + len(pending),
+                                  self.filename)
+                    return
+
+    def _sync(self, csvfile) -> bool:
+        try:
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+            return True
+        except OSError as e:
+            log.error("🚨 ERROR TULIS CSV: fsync '%s' gagal: %s. Dicoba lagi.", self.filename, e)
+            return False
+
+    def _commit(self, rows):
+        if self.on_commit is None:
+            return
+        try:
+            self.on_commit(rows)
+        except Exception as e:
+            log.error("[CSV] on_commit gagal untuk %d baris: %s", len(rows), e)
+
+    def _write(self, csvfile, rows) -> bool:
+        if self._indexes is not None:
+            rows = [['' if index is None else row[index] for index in self._indexes] for row in rows]
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        try:
+            csvfile.write(buf.getvalue())
+            return True
+        except PermissionError:
+            log.error("🚨 ERROR TULIS CSV: Gagal menulis ke '%s'. File MUNGKIN SEDANG TERBUKA DI APLIKASI LAIN. Dicoba lagi.", self.filename)
+        except Exception as e:
+            log.error("🚨 ERROR TULIS CSV: Error tak terduga: %s. Dicoba lagi.", e)
+        return False
+
+
+_csv_writers = {}
+_csv_writers_lock = threading.Lock()
+
+
+def get_csv_writer(filename: str, columns=None) -> CsvWriter:
+    """Satu CsvWriter per file, dipakai bersama semua worker/target yang menulis ke file itu."""
+    key = os.path.abspath(filename)
+    with _csv_writers_lock:
+        writer = _csv_writers.get(key)
+        if writer is None or writer._closed:
+            writer = _csv_writers[key] = CsvWriter(filename, columns=columns)
+        return writer
+
+
+@atexit.register
+def close_csv_writers():
+    """Flush + fsync + tutup semua CsvWriter (dipanggil otomatis saat proses keluar normal)."""
+    with _csv_writers_lock:
+        writers = list(_csv_writers.values())
+        _csv_writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+# =========================
+# DEAD-LETTER QUEUE (SEKOLAH YANG GAGAL)
+# =========================
+_dead_letter_lock = threading.Lock()
+
+
+def dead_letter_path(csv_filename: str) -> str:
+    """result/data_Makassar.csv -> result/data_Makassar_failed.jsonl"""
+    return os.path.splitext(csv_filename)[0] + '_failed.jsonl'
+
+
+def append_dead_letter(filename: str,
+                       sekolah: dict,
+                       province: str,
+                       kota: str,
+                       kecamatan: str,
+                       error: str,
+                       attempts: int) -> None:
+    """Catat satu sekolah yang gagal (JSON per baris) untuk diproses ulang dengan --retry-failed."""
+    record = {
+        'sekolah': sekolah, 'province': province, 'kota': kota, 'kecamatan': kecamatan,
+        'error': error, 'attempts': attempts, 'failed_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+    with _dead_letter_lock:
+        with open(filename, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def load_dead_letters(filename: str) -> list:
+    """Baca dead-letter file; satu entri per sekolah (entri terakhir yang dipakai)."""
+    records = {}
+    if not os.path.exists(filename):
+        return []
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                log.warning("[DLQ] Baris rusak dilewati: %s", line[:80])
+                continue
+            records[record['sekolah']['sekolah_id_enkrip'].strip()] = record
+    return list(records.values())
+
+
+def rewrite_dead_letters(filename: str, records: list) -> None:
+    """Tulis ulang dead-letter file secara atomik (hapus file jika sudah kosong)."""
+    with _dead_letter_lock:
+        if not records:
+            if os.path.exists(filename):
+                os.remove(filename)
+            return
+        tmp = filename + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filename)
+
+
+# =========================
+# PARSER HTML PROFIL SEKOLAH
+# =========================
+_recap_executor = None
+_recap_executor_lock = threading.Lock()
+
+
+_parse_executor = None
+_parse_executor_disabled = False
+
+
+def recap_executor() -> ThreadPoolExecutor:
+    """Pool bersama untuk request rekap sekolahDetail (dibuat sekali, dipakai semua worker)."""
+    global _recap_executor
+    with _recap_executor_lock:
+        if _recap_executor is None:
+            _recap_executor = ThreadPoolExecutor(max_workers=RECAP_WORKERS, thread_name_prefix='rekap')
+        return _recap_executor
+
+
+def parse_executor():
+    """
+    Pool proses bersama untuk parsing (dibuat sekali). None jika PARSE_PROCESSES
+    = 0, mesin hanya punya satu core, atau pool pernah rusak (parse di thread).
+    """
+    global _parse_executor
+    processes = (os.cpu_count() or 1) if PARSE_PROCESSES is None else PARSE_PROCESSES
+    if processes <= 1 or _parse_executor_disabled:
+        return None
+    with _recap_executor_lock:
+        if _parse_executor is None:
+            # forkserver/spawn, bukan fork: proses ini sudah punya banyak thread (lock bisa ikut tersalin terkunci)
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _parse_executor = ProcessPoolExecutor(
+                max_workers=processes, mp_context=context, initializer=_init_parse_process,
+                initargs=(HTML_PARSER, PARSE_REGIONS, PARSER_VERIFY_RATE, PARSE_CHUNK_SIZE))
+            atexit.register(_parse_executor.shutdown, wait=False, cancel_futures=True)
+        return _parse_executor
+
+
+def _init_parse_process(html_parser, parse_regions, verify_rate, chunk_size):
+    # proses baru mengimpor modul ini dari awal: bawa pengaturan parser dari proses utama
+    global HTML_PARSER, PARSE_REGIONS, PARSER_VERIFY_RATE, PARSE_CHUNK_SIZE
+    HTML_PARSER, PARSE_REGIONS, PARSER_VERIFY_RATE, PARSE_CHUNK_SIZE = html_parser, parse_regions, verify_rate, chunk_size
+
+
+def run_parser(fn, *args):
+    """
+    Jalankan fungsi parsing murni `fn(*args)` di pool proses dan tunggu hasilnya.
+    Thread pemanggil melepas GIL selama menunggu, jadi unduhan lain tetap jalan.
+    """
+    global _parse_executor, _parse_executor_disabled
+    executor = parse_executor()
+    if executor is None:
+        return fn(*args)
+    try:
+        return executor.submit(fn, *args).result()
+    except BrokenProcessPool as e:
+        log.warning("[PARSER] Pool proses parser rusak (%s), parsing dilanjutkan di thread.", e)
+        _parse_executor_disabled = True
+        return fn(*args)
+
+
+async def run_parser_async(fn, *args):
+    """
+    Versi asyncio dari run_parser: `fn(*args)` di pool proses parser (atau
+    thread executor default), dengan fallback yang sama jika pool rusak.
+    """
+    global _parse_executor_disabled
+    loop = asyncio.get_running_loop()
+    executor = parse_executor()
+    if executor is not None:
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool as e:
+            log.warning("[PARSER] Pool proses parser rusak (%s), parsing dilanjutkan di thread.", e)
+            _parse_executor_disabled = True
+    return await loop.run_in_executor(None, fn, *args)
+
+
+def sekolah_id_from_url(url: str) -> str:
+    return url.split('/')[-1].strip()
+
+
+def attach_recapitulation(school_data: dict, recapitulation) -> dict:
+    if recapitulation and isinstance(recapitulation, list) and len(recapitulation) > 0:
+        school_data["recapitulation"] = recapitulation[0]
+    return school_data
+
+
+def fetch_school_raw(url: str, semester_id: str = SEMESTER_ID, sources=DETAIL_SOURCES) -> tuple:
+    """
+    Unduh halaman profil dan rekap sekolahDetail sekaligus, tanpa parsing:
+    rekap hanya butuh id sekolah dari URL, jadi request-nya dikirim ke
+    recap_executor() sebelum HTML diunduh. Latensi per sekolah menjadi
+    max(html, rekap). Hanya rekap yang per semester; halaman profil selalu
+    menampilkan data terkini. Endpoint yang tidak ada di `sources` (lihat
+    detail_sources) tidak diminta dan hasilnya None. Mengembalikan (html, rekap).
+    """
+    recap_future = None
+    if 'sekolahDetail' in sources:
+        recap_future = recap_executor().submit(request_api, semester_id=semester_id,
+                                               sekolah_id=sekolah_id_from_url(url), backoff=5)
+    try:
+        html = request_html(url) if 'profil' in sources else None
+    except BaseException:
+        if recap_future is not None:
+            recap_future.cancel()
+        raise
+    return html, recap_future.result() if recap_future is not None else None
+
+
+def school_data_from_raw(html: str, recapitulation) -> dict:
+    """Bagian murni (tanpa jaringan) dari parse_html; aman dijalankan di proses lain."""
+    school_data = parse_profile_html(html) if html is not None else {"profile": {}, "recapitulation": {}, "contact": {}}
+    return attach_recapitulation(school_data, recapitulation)
+
+
+def school_row_from_raw(html: str, recapitulation, sekolah_id_enkrip: str, school_name: str,
+                        province: str, kota: str, kecamatan: str) -> list:
+    """Parsing + penyusunan baris CSV dalam satu panggilan, untuk pool proses parser."""
+    return build_csv_row(sekolah_id_enkrip, school_data_from_raw(html, recapitulation),
+                         school_name, province, kota, kecamatan)
+
+
+def parse_html(url: str, semester_id: str = SEMESTER_ID, sources=DETAIL_SOURCES) -> dict:
+    """Ambil (fetch_school_raw) lalu parse satu sekolah; parsing di pool proses jika aktif."""
+    return run_parser(school_data_from_raw, *fetch_school_raw(url, semester_id, sources))
+
+
+def parse_profile_html(req: str) -> dict:
+    """
+    Parsing halaman profil sekolah (tanpa request jaringan) dengan backend
+    HTML_PARSER. Rekap (sekolahDetail) diisi terpisah oleh pemanggil.
+    Dengan PARSE_REGIONS hanya region #profil, .profile-usermenu dan #kontak
+    yang dibangun; jika tidak ada panel profil yang ketemu, parse penuh.
+    Sebagian kecil halaman (PARSER_VERIFY_RATE) juga diparse penuh oleh
+    backend referensi (bs4); jika hasilnya beda, hasil bs4 yang dipakai.
+    """
+    parser = get_parser()
+    school_data = parser.parse_regions(req) if PARSE_REGIONS else None
+    if not school_data or not school_data["profile"]:
+        school_data = parser.parse(req)
+    if (parser.name != 'bs4' or PARSE_REGIONS) and random.random() < PARSER_VERIFY_RATE:
+        reference = get_parser('bs4').parse(req)
+        if reference != school_data:
+            log.warning("[PARSER] Hasil %s berbeda dari bs4, memakai hasil bs4.", parser.name)
+            return reference
+    return school_data
+
+
+REGION_IDS = ('profil', 'kontak')
+REGION_CLASS = 'profile-usermenu'
+
+
+def is_region_root(attrs) -> bool:
+    """True jika atribut elemen menandai salah satu region yang dibutuhkan parse_html."""
+    classes = attrs.get('class') or ''
+    if not isinstance(classes, str):
+        classes = ' '.join(classes)
+    return attrs.get('id') in REGION_IDS or REGION_CLASS in classes.split()
+
+
+if ElementFilter is not None:
+    class _RegionFilter(ElementFilter):
+        # hanya tag paling luar yang dicek bs4; isi region ikut dibangun utuh
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return is_region_root(attrs or {})
+
+        def allow_string_creation(self, string):
+            return False
+
+    def region_strainer():
+        return _RegionFilter()
+else:
+    def region_strainer():
+        return SoupStrainer(lambda name, attrs: is_region_root(dict(attrs)))
+
+
+class ProfileParser:
+    """
+    Antarmuka backend parser: parse(html) -> school_data
+    {"profile": {...}, "recapitulation": {}, "contact": {...}}.
+    Semua backend wajib menghasilkan dict yang identik dengan BeautifulSoupParser.
+    parse_regions(html) boleh hanya membangun region yang dibutuhkan.
+    """
+    name = None
+
+    def parse(self, html: str) -> dict:
+        raise NotImplementedError
+
+    def parse_regions(self, html: str) -> dict:
+        return self.parse(html)
+
+
+class BeautifulSoupParser(ProfileParser):
+    """Implementasi referensi (BeautifulSoup + html.parser)."""
+    name = 'bs4'
+
+    def parse(self, html: str) -> dict:
+        return self._parse(html, None)
+
+    def parse_regions(self, html: str) -> dict:
+        # parse_only: tag di luar region tidak pernah dibuat jadi objek
+        return self._parse(html, region_strainer())
+
+    def _parse(self, html: str, parse_only) -> dict:
+        soup = BeautifulSoup(html, 'html.parser', parse_only=parse_only)
+        try:
+            return self._extract(soup)
+        finally:
+            soup.decompose()
+
+    def _extract(self, soup) -> dict:
+        school_data = {"profile": {}, "recapitulation": {}, "contact": {}}
+        profile_panels = soup.select('#profil .panel-info')
+
+        for panel in profile_panels:
+            heading_el = panel.find(class_='panel-heading')
+            if not heading_el: continue
+            heading = heading_el.get_text(strip=True)
+            body = panel.find(class_='panel-body')
+            if not body: continue
+
+            section_data = {}
+            for p in body.find_all('p'):
+                strong_tag = p.find('strong')
+                if strong_tag:
+                    key = strong_tag.get_text(strip=True).replace(':', '').strip()
+                    value = strong_tag.next_sibling.strip() if strong_tag.next_sibling else ''
+                    section_data[key] = value
+
+            if "Identitas" in heading: school_data["profile"]["identitas_sekolah"] = section_data
+            elif "Pelengkap" in heading: school_data["profile"]["data_pelengkap"] = section_data
+            elif "Rinci" in heading: school_data["profile"]["data_rinci"] = section_data
+
+        sidebar_menu = soup.find(class_='profile-usermenu')
+        if sidebar_menu:
+            sidebar_data = {}
+            for item in sidebar_menu.find_all('li'):
+                text = item.get_text(strip=True)
+                if ':' in text:
+                    key, value = text.split(':', 1)
+                    sidebar_data[key.strip()] = value.strip()
+            school_data["profile"]["sidebar_info"] = sidebar_data
+
+        contact_panel = soup.select_one('#kontak .panel-info')
+        if contact_panel:
+            contact_info = {}
+            for p in contact_panel.find_all('p'):
+                strong_tag = p.find('strong')
+                if strong_tag:
+                    key = strong_tag.get_text(strip=True).replace(':', '').strip()
+                    value = strong_tag.next_sibling.strip() if strong_tag.next_sibling else ''
+                    contact_info[key] = value
+            school_data["contact"] = contact_info
+
+        return school_data
+
+
+def _xp_class(name: str) -> str:
+    # padanan selector CSS `.name` dalam XPath
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlParser(ProfileParser):
+    """
+    Backend cepat berbasis lxml (parser C, XPath terkompilasi). Logikanya
+    meniru BeautifulSoupParser langkah demi langkah, termasuk semantik
+    get_text(strip=True) dan next_sibling.
+    """
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        self._etree = etree
+        self._profil_panels = etree.XPath(f"//*[@id='profil']//*[{_xp_class('panel-info')}]")
+        self._kontak_panels = etree.XPath(f"//*[@id='kontak']//*[{_xp_class('panel-info')}]")
+        self._inner_panels = etree.XPath(f".//*[{_xp_class('panel-info')}]")
+        self._heading = etree.XPath(f".//*[{_xp_class('panel-heading')}]")
+        self._body = etree.XPath(f".//*[{_xp_class('panel-body')}]")
+        self._usermenu = etree.XPath(f"//*[{_xp_class('profile-usermenu')}]")
+        self._texts = etree.XPath(".//text()")
+
+    def _text(self, el) -> str:
+        # = get_text(strip=True): gabungan semua teks turunan (tanpa komentar) yang sudah di-strip
+        return ''.join(t.strip() for t in self._texts(el))
+
+    def _next_sibling_text(self, el) -> str:
+        # = strong.next_sibling.strip(): teks tepat setelah <strong>, atau isi komentar setelahnya
+        if el.tail is not None:
+            return el.tail.strip()
+        nxt = el.getnext()
+        if nxt is not None and nxt.tag is self._etree.Comment:
+            return (nxt.text or '').strip()
+        return ''
+
+    def _strong_pairs(self, container) -> dict:
+        data = {}
+        for p in container.iterdescendants('p'):
+            strong_tag = next(p.iterdescendants('strong'), None)
+            if strong_tag is not None:
+                key = self._text(strong_tag).replace(':', '').strip()
+                data[key] = self._next_sibling_text(strong_tag)
+        return data
+
+    def _profile_panels(self, panels, school_data):
+        for panel in panels:
+            headings = self._heading(panel)
+            if not headings: continue
+            heading = self._text(headings[0])
+            bodies = self._body(panel)
+            if not bodies: continue
+
+            section_data = self._strong_pairs(bodies[0])
+            if "Identitas" in heading: school_data["profile"]["identitas_sekolah"] = section_data
+            elif "Pelengkap" in heading: school_data["profile"]["data_pelengkap"] = section_data
+            elif "Rinci" in heading: school_data["profile"]["data_rinci"] = section_data
+
+    def _sidebar(self, menu, school_data):
+        sidebar_data = {}
+        for item in menu.iterdescendants('li'):
+            text = self._text(item)
+            if ':' in text:
+                key, value = text.split(':', 1)
+                sidebar_data[key.strip()] = value.strip()
+        school_data["profile"]["sidebar_info"] = sidebar_data
+
+    def parse(self, html: str) -> dict:
+        root = lxml.html.document_fromstring(html)
+        school_data = {"profile": {}, "recapitulation": {}, "contact": {}}
+
+        self._profile_panels(self._profil_panels(root), school_data)
+        menus = self._usermenu(root)
+        if menus:
+            self._sidebar(menus[0], school_data)
+        contacts = self._kontak_panels(root)
+        if contacts:
+            school_data["contact"] = self._strong_pairs(contacts[0])
+
+        return school_data
+
+    def _events(self, html: str):
+        parser = self._etree.HTMLPullParser(events=('start', 'end'))
+        for offset in range(0, len(html), PARSE_CHUNK_SIZE):
+            parser.feed(html[offset:offset + PARSE_CHUNK_SIZE])
+            yield from parser.read_events()
+        parser.close()
+        yield from parser.read_events()
+
+    @staticmethod
+    def _is_root(el) -> bool:
+        # versi cepat is_region_root() tanpa membuat proxy el.attrib
+        if el.get('id') in REGION_IDS:
+            return True
+        classes = el.get('class')
+        return classes is not None and REGION_CLASS in classes and REGION_CLASS in classes.split()
+
+    def parse_regions(self, html: str) -> dict:
+        """
+        Satu pass streaming: region diekstrak begitu tag penutupnya lewat,
+        elemen lain langsung dibuang sehingga pohon tidak pernah utuh di memori.
+        """
+        school_data = {"profile": {}, "recapitulation": {}, "contact": {}}
+        depth = 0 # kedalaman di dalam region (0 = di luar semua region)
+        has_sidebar = has_contact = False
+
+        for event, el in self._events(html):
+            if event == 'start':
+                if depth or self._is_root(el):
+                    depth += 1
+                continue
+
+            if depth:
+                depth -= 1
+                if self._is_root(el):
+                    el_id = el.get('id')
+                    if el_id == 'profil':
+                        self._profile_panels(self._inner_panels(el), school_data)
+                    elif el_id == 'kontak' and not has_contact:
+                        panels = self._inner_panels(el)
+                        if panels:
+                            school_data["contact"] = self._strong_pairs(panels[0])
+                            has_contact = True
+                    if not has_sidebar and REGION_CLASS in (el.get('class') or '').split():
+                        self._sidebar(el, school_data)
+                        has_sidebar = True
+                if depth:
+                    continue
+
+            el.clear(keep_tail=True)
+            parent = el.getparent()
+            if parent is not None and len(parent) > 1:
+                del parent[:-1]
+
+        return school_data
+
+
+PARSERS = {'bs4': BeautifulSoupParser, 'lxml': LxmlParser}
+_parser_instances = {}
+
+
+def available_parsers() -> list:
+    return [name for name in PARSERS if name != 'lxml' or lxml is not None]
+
+
+def get_parser(name: str = None) -> ProfileParser:
+    """Instance parser (stateless, aman dipakai bersama antar thread)."""
+    name = name or HTML_PARSER
+    if name == 'auto':
+        name = 'lxml' if lxml is not None else 'bs4'
+    if name not in available_parsers():
+        raise ValueError(f"Parser HTML '{name}' tidak tersedia (pilihan: {', '.join(available_parsers())})")
+    parser = _parser_instances.get(name)
+    if parser is None:
+        parser = _parser_instances[name] = PARSERS[name]()
+    return parser
+
+
+def verify_parsers(html: str) -> bool:
+    """True jika semua backend yang terpasang menghasilkan school_data identik untuk html ini."""
+    reference = get_parser('bs4').parse(html)
+    ok = True
+    for name in available_parsers():
+        if name != 'bs4' and get_parser(name).parse(html) != reference:
+            log.warning("[PARSER] Hasil %s berbeda dari bs4.", name)
+            ok = False
+    return ok
+
+
+# =========================
+# ENGINE ASYNCIO (OPSIONAL, BUTUH aiohttp)
+# =========================
+def _require_aiohttp() -> None:
+    if aiohttp is None:
+        raise RuntimeError("Engine asyncio butuh aiohttp: pip install aiohttp")
+
+
+def open_async_session(concurrency: int = ASYNC_CONCURRENCY):
+    """Satu ClientSession untuk seluruh crawl; batas koneksi = concurrency."""
+    _require_aiohttp()
+    connector = aiohttp.TCPConnector(limit=concurrency, ssl=False)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def request_api_async(session,
+                            base_url: str = BASE_URL,
+                            level_wilayah=LEVEL_WILAYAH,
+                            kode_wilayah: str = KODE_WILAYAH,
+                            semester_id: str = SEMESTER_ID,
+                            sekolah_id: str = None,
+                            backoff: float = 0.5,
+                            max_attempts: int = None) -> dict:
+    """
+    Versi asyncio dari request_api (perilaku retry sama).
+    Saat menunggu respons, event loop bebas melayani request lain.
+    """
+    url = build_api_url(base_url, level_wilayah, kode_wilayah, semester_id, sekolah_id)
+    # gzip + JSON + I/O disk cache di thread executor, bukan di event loop
+    loop = asyncio.get_running_loop()
+    cached = await loop.run_in_executor(None, HTTP_CACHE.get, url, semester_id)
+    if cached is not None:
+        return json.loads(cached)
+
+    RETRY_BUDGET.on_request()
+    attempt = 0
+    while True:
+        attempt += 1
+        status = None
+        try:
+            await BREAKER.wait_async()
+            await RATE_LIMITER.acquire_async(url)
+            log.debug("[API] GET %s", url, extra={'event': 'request', 'url': url})
+            async with CONCURRENCY.slot_async() as slot:
+                with BREAKER.observe(slot):
+                    async with session.get(url) as res:
+                        status = res.status
+                        text = (await res.text()).strip()
+                    slot.outcome = classify_response(status, text, expect_json=True)
+
+            if status != 200:
+                reason = f"HTTP {status}"
+            elif is_html_body(text):
+                reason = "Server balas HTML (kemungkinan anti-bot)"
+            else:
+                data = json.loads(text)
+                await loop.run_in_executor(None, HTTP_CACHE.put, url, text, semester_id)
+                return data
+
+        except Exception as e:
+            reason = f"ERROR {e!r}"
+
+        if is_permanent_status(status):
+            raise RetryExhausted(f"{reason} untuk {url} (tidak dicoba ulang)")
+        delay = RETRY_POLICY.next_delay(attempt, backoff, max_attempts)
+        if delay is None:
+            raise RetryExhausted(f"{reason} untuk {url} (menyerah setelah {attempt} percobaan)",
+                                 transient=RETRY_POLICY.attempts_left(attempt, max_attempts))
+        log.warning("[API] %s untuk %s, retry ke-%d dalam %.1fs...", reason, url, attempt, delay,
+                    extra={'event': 'retry', 'url': url, 'attempt': attempt})
+        await asyncio.sleep(delay)
+
+
+async def request_html_async(session, url: str, backoff: float = 0.5, max_attempts: int = None,
+                             semester_id: str = SEMESTER_ID) -> str:
+    """Versi asyncio dari request_html (perilaku retry sama)."""
+    if not url.startswith('http'):
+        raise ValueError(f"Invalid URL: {url}")
+
+    # gzip + JSON + I/O disk cache di thread executor, bukan di event loop
+    loop = asyncio.get_running_loop()
+    cached = await loop.run_in_executor(None, HTTP_CACHE.get, url, semester_id)
+    if cached is not None:
+        return cached
+
+    RETRY_BUDGET.on_request()
+    attempt = 0
+    while True:
+        attempt += 1
+        status = None
+        try:
+            await BREAKER.wait_async()
+            await RATE_LIMITER.acquire_async(url)
+            log.debug("[HTML] GET %s", url, extra={'event': 'request', 'url': url})
+            async with CONCURRENCY.slot_async() as slot:
+                with BREAKER.observe(slot):
+                    async with session.get(url) as res:
+                        status = res.status
+                        text = await res.text()
+                    slot.outcome = classify_response(status, text, expect_json=False)
+
+            if status != 200:
+                reason = f"HTTP {status}"
+            elif is_antibot_page(text):
+                reason = "User validation / anti-bot"
+            else:
+                await loop.run_in_executor(None, HTTP_CACHE.put, url, text, semester_id)
+                return text
+
+        except Exception as e:
+            reason = f"ERROR {e!r}"
+
+        if is_permanent_status(status):
+            raise RetryExhausted(f"{reason} untuk {url} (tidak dicoba ulang)")
+        delay = RETRY_POLICY.next_delay(attempt, backoff, max_attempts)
+        if delay is None:
+            raise RetryExhausted(f"{reason} untuk {url} (menyerah setelah {attempt} percobaan)",
+                                 transient=RETRY_POLICY.attempts_left(attempt, max_attempts))
+        log.warning("[HTML] %s untuk %s, retry ke-%d dalam %.1fs...", reason, url, attempt, delay,
+                    extra={'event': 'retry', 'url': url, 'attempt': attempt})
+        await asyncio.sleep(delay)
+
+
+async def parse_html_async(session, url: str, semester_id: str = SEMESTER_ID, sources=DETAIL_SOURCES) -> dict:
+    """
+    Versi asyncio dari parse_html: request rekap berjalan sebagai task
+    terpisah selama HTML diunduh, dan parsing dijalankan di pool proses
+    parser (atau thread executor) supaya event loop tidak tertahan selama parsing.
+    Hanya endpoint di `sources` yang diminta.
+    """
+    recap_task = None
+    if 'sekolahDetail' in sources:
+        recap_task = asyncio.ensure_future(
+            request_api_async(session, semester_id=semester_id, sekolah_id=sekolah_id_from_url(url), backoff=5))
+    try:
+        req = await request_html_async(session, url) if 'profil' in sources else None
+        school_data = await run_parser_async(school_data_from_raw, req, None)
+    except BaseException:
+        if recap_task is not None:
+            recap_task.cancel()
+        raise
+    return attach_recapitulation(school_data, await recap_task if recap_task is not None else None)
+
+
+async def scrape_schools_async(items, handler, concurrency: int = ASYNC_CONCURRENCY, on_error=None) -> int:
+    """
+    Driver asyncio: `items` berisi pasangan (sekolah_id_enkrip, payload) atau
+    (sekolah_id_enkrip, payload, semester_id[, sources]) untuk crawl beberapa
+    semester / hanya sebagian endpoint detail,
+    `handler(payload, school_data)` dipanggil untuk setiap sekolah yang selesai,
+    `on_error(payload, exc)` (opsional) untuk sekolah yang gagal.
+    Paling banyak `concurrency` sekolah diproses bersamaan; antrean dibatasi
+    supaya daftar sekolah yang sangat panjang tidak dimuat sekaligus.
+    Mengembalikan jumlah sekolah yang berhasil diproses.
+    """
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    done = 0
+
+    async with open_async_session(concurrency) as session:
+        async def worker():
+            nonlocal done
+            while True:
+                item = await queue.get()
+                try:
+                    if item is None:
+                        return
+                    sekolah_id_enkrip, payload, *options = item
+                    try:
+                        school_data = await parse_html_async(session, school_url(sekolah_id_enkrip),
+                                                             *options)
+                        handler(payload, school_data)
+                        done += 1
+                    except Exception as e:
+                        log.warning("[ASYNC ERROR] %s: %s", sekolah_id_enkrip, e,
+                                    extra={'event': 'school_error', 'sekolah_id': sekolah_id_enkrip})
+                        if on_error is not None:
+                            on_error(payload, e)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        # `items` boleh generator yang melakukan request (listing kecamatan): diambil
+        # di thread executor supaya event loop tetap memproses sekolah yang sudah ada
+        loop = asyncio.get_running_loop()
+        iterator = iter(items)
+        while True:
+            item = await loop.run_in_executor(None, next, iterator, None)
+            if item is None:
+                break
+            await queue.put(item)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    return done
+
+
+def run_schools_async(items, handler, concurrency: int = ASYNC_CONCURRENCY, on_error=None) -> int:
+    """Pembungkus sinkron untuk scrape_schools_async (dipanggil dari main() skrip)."""
+    _require_aiohttp()
+    return asyncio.run(scrape_schools_async(items, handler, concurrency, on_error))
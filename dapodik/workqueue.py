@@ -0,0 +1,704 @@
+import os
+import json
+import hmac
+import time
+import ipaddress
+import uuid
+import socket
+import sqlite3
+import logging
+import threading
+import socketserver
+import concurrent.futures
+
+# ==========================================================
+# ANTREAN KERJA MULTI-NODE (COORDINATOR & WORKER)
+# ==========================================================
+# Coordinator me-resolve wilayah target sampai kecamatan, lalu mengisi
+# antrean dengan item kerja:
+#   kecamatan -> worker mengambil daftar sekolah (progresSP)
+#   sekolah   -> worker mengambil halaman profil + rekap sekolahDetail
+# Worker (boleh di mesin lain, masing-masing dengan IP keluar sendiri)
+# menyewa (lease) item, mengirim heartbeat selama mengerjakan, lalu
+# melapor hasil. Lease yang tidak diperpanjang (worker crash / putus)
+# kedaluwarsa dan item kembali ke antrean. Hanya coordinator yang menulis
+# output & jurnal, jadi worker tidak perlu akses ke folder result/.
+#
+# Backend antrean: SQLite (worker di mesin yang sama cukup --queue FILE)
+# atau server TCP kecil (JSON per baris) di depan SQLite yang sama.
+from .utils import request_api, parse_html, school_url, append_dead_letter, DETAIL_SOURCES, RETRY_POLICY, RetryExhausted
+from .runner import Crawler, MAX_WORKERS, RETRY_DELAY, SCHOOL_MAX_ATTEMPTS, log_target
+from .logs import Progress, ensure_logging
+
+QUEUE_FILE = os.path.join('result', 'work_queue.db')
+QUEUE_PORT = 8765
+LEASE_SECONDS = 120.0        # lama sewa item; diperpanjang heartbeat selama masih dikerjakan
+HEARTBEAT_INTERVAL = 30.0    # detik antar heartbeat worker (harus jauh di bawah LEASE_SECONDS)
+POLL_INTERVAL = 2.0          # jeda worker / coordinator saat antrean kosong
+PROGRESS_INTERVAL = 30.0     # detik antar baris progres coordinator
+RPC_MAX_ATTEMPTS = 6         # percobaan koneksi ulang worker ke coordinator sebelum menyerah
+
+ITEM_STATUSES = ('pending', 'leased', 'done', 'failed')
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS item (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    data        TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    worker      TEXT,
+    token       TEXT,
+    lease_until REAL,
+    not_before  REAL NOT NULL DEFAULT 0,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result      TEXT,
+    error       TEXT,
+    collected   INTEGER NOT NULL DEFAULT 0,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_item_status ON item (status, not_before);
+CREATE INDEX IF NOT EXISTS idx_item_collect ON item (collected, status);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+# =========================
+# ANTREAN SQLITE
+# =========================
+class SqliteWorkQueue:
+    """
+    Antrean item kerja dengan lease di SQLite (WAL). Aman dipakai beberapa
+    thread (satu koneksi + lock) maupun beberapa proses di mesin yang sama
+    (lease diambil dalam transaksi BEGIN IMMEDIATE).
+
+    Setiap lease membawa token acak; complete/fail/heartbeat dengan token
+    lama (lease sudah kedaluwarsa dan item disewa worker lain) diabaikan.
+    """
+
+    def __init__(self, path: str = QUEUE_FILE, max_attempts: int = SCHOOL_MAX_ATTEMPTS,
+                 retry_delay: float = RETRY_DELAY):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _execute(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    # --- sisi coordinator ---
+    def put(self, items, reopen: bool = False) -> int:
+        """
+        Tambah item (id, kind, data). Item yang sudah ada tidak diubah, kecuali
+        `reopen` dan item itu sudah selesai diproses coordinator (dikerjakan ulang).
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT INTO item (id, kind, data, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET status = 'pending', data = excluded.data, token = NULL, "
+                    "attempts = 0, not_before = 0, result = NULL, error = NULL, collected = 0, updated_at = excluded.updated_at "
+                    "WHERE ? AND status IN ('done', 'failed') AND collected = 1",
+                    [(item_id, kind, json.dumps(data, ensure_ascii=False), now, reopen) for item_id, kind, data in items])
+                changed = self._conn.total_changes - before
+                if changed:
+                    # ada pekerjaan baru -> tanda selesai run sebelumnya tidak berlaku lagi
+                    self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('finished', '0')")
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+        return changed
+
+    def drop_stale(self, keep) -> int:
+        """
+        Hapus item yang belum diproses coordinator dan bukan milik target run
+        ini (`keep`: kumpulan Target.key), mis. sisa coordinator lama dengan
+        daftar target lain di file antrean yang sama.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id, data FROM item WHERE collected = 0").fetchall()
+            stale = [(item_id,) for item_id, data in rows if json.loads(data).get('run') not in keep]
+            if stale:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany("DELETE FROM item WHERE id = ?", stale)
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    if self._conn.in_transaction:
+                        self._conn.execute("ROLLBACK")
+                    raise
+        if stale:
+            log.warning("[QUEUE] %d item sisa run lain (target berbeda) dihapus dari antrean.", len(stale),
+                        extra={'event': 'queue_stale', 'items': len(stale)})
+        return len(stale)
+
+    def requeue_expired(self) -> int:
+        """Item yang lease-nya lewat (worker crash / putus) dikembalikan ke 'pending'."""
+        cur = self._execute(
+            "UPDATE item SET status = 'pending', token = NULL, worker = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_until < ?",
+            (time.time(), time.time()))
+        if cur.rowcount:
+            log.warning("[QUEUE] %d item dengan lease kedaluwarsa dikembalikan ke antrean.", cur.rowcount,
+                        extra={'event': 'lease_expired', 'items': cur.rowcount})
+        return cur.rowcount
+
+    def collect(self, limit: int = 500) -> list:
+        """Item 'done' / 'failed' yang belum diproses coordinator."""
+        rows = self._execute(
+            "SELECT id, kind, data, status, result, error, attempts FROM item "
+            "WHERE collected = 0 AND status IN ('done', 'failed') LIMIT ?", (limit,)).fetchall()
+        return [{'id': item_id, 'kind': kind, 'data': json.loads(data), 'status': status,
+                 'result': json.loads(result) if result is not None else None, 'error': error, 'attempts': attempts}
+                for item_id, kind, data, status, result, error, attempts in rows]
+
+    def mark_collected(self, ids) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("UPDATE item SET collected = 1, result = NULL WHERE id = ?", [(i,) for i in ids])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+
+    def counts(self) -> dict:
+        rows = dict(self._execute("SELECT status, COUNT(*) FROM item GROUP BY status").fetchall())
+        counts = {status: rows.get(status, 0) for status in ITEM_STATUSES}
+        counts['uncollected'] = self._execute(
+            "SELECT COUNT(*) FROM item WHERE collected = 0 AND status IN ('done', 'failed')").fetchone()[0]
+        return counts
+
+    def set_finished(self, finished: bool) -> None:
+        """Ditandai coordinator: tidak akan ada item baru lagi, worker boleh berhenti."""
+        self._execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('finished', ?)", ('1' if finished else '0',))
+
+    def is_finished(self) -> bool:
+        """Coordinator sudah menandai selesai dan memang tidak ada item 'pending' / 'leased' lagi."""
+        row = self._execute("SELECT value FROM meta WHERE key = 'finished'").fetchone()
+        if not row or row[0] != '1':
+            return False
+        return not self._execute("SELECT 1 FROM item WHERE status IN ('pending', 'leased') LIMIT 1").fetchone()
+
+    # --- sisi worker ---
+    def lease(self, worker: str, n: int = 1, lease_seconds: float = LEASE_SECONDS) -> list:
+        """Sewa sampai `n` item 'pending' untuk `worker`: list dict id, kind, data, token, attempt."""
+        now = time.time()
+        leased = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, kind, data, attempts FROM item "
+                    "WHERE status = 'pending' AND not_before <= ? ORDER BY rowid LIMIT ?", (now, n)).fetchall()
+                for item_id, kind, data, attempts in rows:
+                    token = uuid.uuid4().hex
+                    self._conn.execute(
+                        "UPDATE item SET status = 'leased', worker = ?, token = ?, lease_until = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (worker, token, now + lease_seconds, now, item_id))
+                    leased.append({'id': item_id, 'kind': kind, 'data': json.loads(data),
+                                   'token': token, 'attempt': attempts + 1})
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+        return leased
+
+    def heartbeat(self, worker: str, leases, lease_seconds: float = LEASE_SECONDS) -> list:
+        """Perpanjang lease [(id, token), ...]; kembalikan id yang sudah bukan milik worker ini."""
+        lost = []
+        until = time.time() + lease_seconds
+        with self._lock:
+            for item_id, token in leases:
+                cur = self._conn.execute(
+                    "UPDATE item SET lease_until = ? WHERE id = ? AND token = ? AND status = 'leased'",
+                    (until, item_id, token))
+                if not cur.rowcount:
+                    lost.append(item_id)
+        return lost
+
+    def complete(self, item_id: str, token: str, result) -> bool:
+        cur = self._execute(
+            "UPDATE item SET status = 'done', result = ?, error = NULL, token = NULL, updated_at = ? "
+            "WHERE id = ? AND token = ? AND status = 'leased'",
+            (json.dumps(result, ensure_ascii=False), time.time(), item_id, token))
+        return cur.rowcount == 1
+
+    def fail(self, item_id: str, token: str, error: str, final: bool = False) -> bool:
+        """
+        Percobaan gagal: item kembali 'pending' dengan jeda full-jitter, atau
+        'failed' setelah max_attempts atau jika `final` (percobaan ulang tidak
+        ada gunanya); item 'failed' dicatat coordinator ke dead-letter file.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts FROM item WHERE id = ? AND token = ? AND status = 'leased'",
+                (item_id, token)).fetchone()
+            if row is None:
+                return False
+            attempts = row[0]
+            now = time.time()
+            if final or attempts >= self.max_attempts:
+                self._conn.execute(
+                    "UPDATE item SET status = 'failed', error = ?, token = NULL, updated_at = ? WHERE id = ?",
+                    (error, now, item_id))
+            else:
+                self._conn.execute(
+                    "UPDATE item SET status = 'pending', error = ?, token = NULL, worker = NULL, "
+                    "not_before = ?, updated_at = ? WHERE id = ?",
+                    (error, now + RETRY_POLICY.backoff(attempts, self.retry_delay), now, item_id))
+        return True
+
+
+# =========================
+# SERVER & CLIENT TCP (JSON PER BARIS)
+# =========================
+# Operasi yang boleh dipanggil worker lewat jaringan
+RPC_METHODS = ('lease', 'heartbeat', 'complete', 'fail', 'is_finished', 'counts')
+
+
+def parse_address(address: str, default_host: str = '127.0.0.1'):
+    """'host:port', ':port' atau 'host' -> (host, port)."""
+    host, sep, port = address.rpartition(':')
+    if not sep:
+        return address or default_host, QUEUE_PORT
+    return host or default_host, int(port)
+
+
+def is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class _QueueRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = {'ok': True, 'result': self.server.dispatch(json.loads(line))}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+
+class QueueServer(socketserver.ThreadingTCPServer):
+    """
+    Server antrean untuk worker di mesin lain. Satu permintaan per baris:
+    {"op": "lease", "args": {...}, "secret": "..."} -> {"ok": true, "result": ...}.
+    Jika `secret` diisi, setiap permintaan harus membawa secret yang sama;
+    secret wajib jika server tidak hanya mendengarkan di loopback.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, queue: SqliteWorkQueue, address, secret: str = None):
+        if not secret and not is_loopback(address[0]):
+            raise ValueError(f"Server antrean di {address[0]} bisa diakses mesin lain; wajib memakai --secret")
+        self.queue = queue
+        self.secret = secret
+        super().__init__(address, _QueueRequestHandler)
+
+    def dispatch(self, request: dict):
+        if self.secret and not hmac.compare_digest(str(request.get('secret', '')), self.secret):
+            raise PermissionError("secret antrean salah")
+        op = request.get('op')
+        if op not in RPC_METHODS:
+            raise ValueError(f"Operasi '{op}' tidak dikenal")
+        return getattr(self.queue, op)(**request.get('args', {}))
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name='queue-server', daemon=True)
+        thread.start()
+        host, port = self.server_address[:2]
+        log.info("[QUEUE] Server antrean mendengarkan di %s:%s", host, port)
+        return thread
+
+
+class RemoteQueue:
+    """
+    Client QueueServer dengan antarmuka yang sama seperti SqliteWorkQueue
+    (sisi worker). Koneksi dibuka ulang otomatis dengan backoff jika putus,
+    misalnya saat coordinator di-restart.
+    """
+
+    def __init__(self, address: str, secret: str = None, timeout: float = 60.0):
+        self.address = parse_address(address)
+        self.secret = secret
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._file = self._sock.makefile('rwb')
+
+    def _disconnect(self):
+        for handle in (self._file, self._sock):
+            try:
+                if handle is not None:
+                    handle.close()
+            except OSError:
+                pass
+        self._sock = self._file = None
+
+    def _call(self, op: str, **args):
+        request = {'op': op, 'args': args}
+        if self.secret:
+            request['secret'] = self.secret
+        line = (json.dumps(request, ensure_ascii=False) + '\n').encode('utf-8')
+        attempt = 0
+        with self._lock:
+            while True:
+                attempt += 1
+                try:
+                    if self._file is None:
+                        self._connect()
+                    self._file.write(line)
+                    self._file.flush()
+                    reply = self._file.readline()
+                    if not reply:
+                        raise ConnectionError("koneksi ditutup coordinator")
+                    break
+                except OSError as e:
+                    self._disconnect()
+                    if attempt >= RPC_MAX_ATTEMPTS:
+                        raise
+                    delay = RETRY_POLICY.backoff(attempt, 1.0)
+                    log.warning("[QUEUE] %s ke %s:%s gagal (%s), coba lagi dalam %.1fs...", op, *self.address[:2], e, delay)
+                    time.sleep(delay)
+        response = json.loads(reply)
+        if not response.get('ok'):
+            raise RuntimeError(f"[QUEUE] {op} ditolak: {response.get('error')}")
+        return response['result']
+
+    def lease(self, worker: str, n: int = 1, lease_seconds: float = LEASE_SECONDS) -> list:
+        return self._call('lease', worker=worker, n=n, lease_seconds=lease_seconds)
+
+    def heartbeat(self, worker: str, leases, lease_seconds: float = LEASE_SECONDS) -> list:
+        return self._call('heartbeat', worker=worker, leases=[list(lease) for lease in leases],
+                          lease_seconds=lease_seconds)
+
+    def complete(self, item_id: str, token: str, result) -> bool:
+        return self._call('complete', item_id=item_id, token=token, result=result)
+
+    def fail(self, item_id: str, token: str, error: str, final: bool = False) -> bool:
+        return self._call('fail', item_id=item_id, token=token, error=error, final=final)
+
+    def is_finished(self) -> bool:
+        return self._call('is_finished')
+
+    def counts(self) -> dict:
+        return self._call('counts')
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+def open_queue(connect: str = None, path: str = QUEUE_FILE, secret: str = None):
+    """Antrean untuk worker: RemoteQueue jika `connect` (host:port), selain itu SQLite lokal."""
+    if connect:
+        return RemoteQueue(connect, secret=secret)
+    return SqliteWorkQueue(path)
+
+
+# =========================
+# WORKER
+# =========================
+class Worker:
+    """
+    Menyewa item dari antrean sebanyak thread yang kosong, mengerjakannya
+    dengan request_api / parse_html (rate limiter, AIMD, breaker dan cache
+    lokal mesin ini), lalu melapor hasil. Thread heartbeat memperpanjang
+    lease semua item yang sedang dikerjakan. Berhenti saat coordinator
+    menandai antrean selesai.
+    """
+
+    def __init__(self, queue, name: str = None, max_workers: int = MAX_WORKERS,
+                 lease_seconds: float = LEASE_SECONDS, heartbeat_interval: float = HEARTBEAT_INTERVAL):
+        self.queue = queue
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.max_workers = max_workers
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.held = {}  # id -> token item yang sedang dikerjakan
+        self.done = 0
+        self.failed = 0
+        self.progress = Progress('worker')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    @staticmethod
+    def process(item: dict):
+        data = item['data']
+        if item['kind'] == 'kecamatan':
+            return request_api(level_wilayah=data['id_level_wilayah'], kode_wilayah=data['kode_wilayah'],
+                               semester_id=data['semester_id'], backoff=5)
+        # item dari coordinator lama tanpa 'sources': ambil semua endpoint detail
+        return parse_html(school_url(data['sekolah_id_enkrip']), data['semester_id'],
+                          data.get('sources', DETAIL_SOURCES))
+
+    def handle(self, item: dict):
+        label = item['data'].get('nama') or item['id']
+        log.debug("      [%s] %s (Percobaan ke-%d)", item['kind'], label, item['attempt'],
+                  extra={'event': 'queue_item', 'item': item['id'], 'attempt': item['attempt']})
+        try:
+            try:
+                result = self.process(item)
+            except Exception as e:
+                log.warning("      ❌ Error %s %s: %s", item['kind'], label, e,
+                            extra={'event': 'queue_item_error', 'item': item['id'], 'attempt': item['attempt']})
+                self.progress.add('failed')
+                with self._lock:
+                    self.failed += 1
+                # sama seperti Crawler.process_school: item hanya diulang jika request
+                # berhenti karena budget retry global, bukan 4xx / batas percobaan request
+                final = not (isinstance(e, RetryExhausted) and e.transient)
+                try:
+                    self.queue.fail(item['id'], item['token'], str(e), final)
+                except Exception as e:
+                    # lease kedaluwarsa dengan sendirinya, item dicoba lagi
+                    log.warning("[QUEUE] Gagal melaporkan kegagalan %s: %s", label, e)
+                return
+            try:
+                completed = self.queue.complete(item['id'], item['token'], result)
+            except Exception as e:
+                log.warning("[QUEUE] Gagal melaporkan hasil %s: %s", label, e)
+                return
+            if completed:
+                log.info("      ✅ SUCCESS: %s dilaporkan ke coordinator.", label,
+                         extra={'event': 'school_saved', 'item': item['id']})
+                self.progress.add('done')
+                with self._lock:
+                    self.done += 1
+            else:
+                log.warning("      ⚠️ Lease %s sudah kedaluwarsa, hasil dibuang.", label,
+                            extra={'event': 'lease_lost', 'item': item['id']})
+        finally:
+            with self._lock:
+                self.held.pop(item['id'], None)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                leases = list(self.held.items())
+            if not leases:
+                continue
+            try:
+                lost = self.queue.heartbeat(self.name, leases, self.lease_seconds)
+            except Exception as e:
+                log.warning("[QUEUE] Heartbeat gagal: %s", e)
+                continue
+            if lost:
+                log.warning("[QUEUE] %d lease sudah diambil alih worker lain.", len(lost))
+
+    def run(self):
+        log.info("Worker %s mulai (max %d item bersamaan)...", self.name, self.max_workers)
+        self.progress.start()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name='heartbeat', daemon=True)
+        heartbeat.start()
+        running = set()
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                while True:
+                    free = self.max_workers - len(running)
+                    items = self.queue.lease(self.name, free, self.lease_seconds) if free else []
+                    for item in items:
+                        with self._lock:
+                            self.held[item['id']] = item['token']
+                        running.add(executor.submit(self.handle, item))
+                    if not running:
+                        if self.queue.is_finished():
+                            break
+                        time.sleep(POLL_INTERVAL)
+                        continue
+                    _, running = concurrent.futures.wait(
+                        running, timeout=POLL_INTERVAL, return_when=concurrent.futures.FIRST_COMPLETED)
+        finally:
+            self._stop.set()
+            self.progress.stop()
+        log.info("Worker %s selesai: %d item berhasil, %d percobaan gagal.", self.name, self.done, self.failed,
+                 extra={'event': 'worker_finished', 'worker': self.name, 'done': self.done, 'failed': self.failed})
+
+
+# =========================
+# COORDINATOR
+# =========================
+class Coordinator(Crawler):
+    """
+    Crawler yang tidak mengambil data sendiri: wilayah target di-resolve
+    sampai kecamatan lalu dimasukkan ke antrean. Hasil listing kecamatan
+    disaring (filter target, jurnal, mode inkremental) menjadi item sekolah;
+    hasil sekolah ditulis ke output & jurnal persis seperti crawl biasa.
+    """
+
+    def __init__(self, targets, queue: SqliteWorkQueue, **kwargs):
+        super().__init__(targets, **kwargs)
+        self.queue = queue
+        # item antrean merujuk target lewat Target.key, bukan posisi di daftar target
+        self.targets_by_key = {target.key: target for target in self.runs}
+
+    def school_item(self, payload) -> tuple:
+        target, sekolah, province_name, city_name, kecamatan_name = payload
+        sid = sekolah['sekolah_id_enkrip'].strip()
+        return (f"sekolah|{target.key}|{sid}", 'sekolah', {
+            'run': target.key, 'sekolah_id_enkrip': sid, 'semester_id': target.semester_id, 'nama': sekolah['nama'],
+            'sources': list(self.detail_sources),
+            'sekolah': sekolah, 'provinsi': province_name, 'kota': city_name, 'kecamatan': kecamatan_name,
+        })
+
+    def expand(self) -> int:
+        """Isi antrean: sekolah tertunda dari jurnal, lalu semua kecamatan setiap target."""
+        items = []
+        self.queue.drop_stale(self.targets_by_key)
+        for target in self.runs:
+            log_target(target)
+            self.prepare_output(target)
+            for sekolah, province_name, city_name, kecamatan_name in self.journal_for(target).unfinished(target.csv):
+                key = (target.semester_id, sekolah['sekolah_id_enkrip'].strip())
+                if key not in self.dispatched:
+                    self.dispatched.add(key)
+                    payload = (target, sekolah, province_name, city_name, kecamatan_name)
+                    if not self.detail_sources:
+                        self.save_listing(payload)
+                        continue
+                    self.progress.add('queued')
+                    items.append(self.school_item(payload))
+
+        # urutan & budget kecamatan mengikuti planner (lihat Crawler.kecamatan_units)
+        for target, province, kota, kecamatan in self.kecamatan_units():
+            kode = kecamatan['kode_wilayah'].strip()
+            items.append((f"kecamatan|{target.key}|{kode}", 'kecamatan', {
+                'run': target.key, 'kode_wilayah': kode, 'id_level_wilayah': kecamatan['id_level_wilayah'],
+                'semester_id': target.semester_id, 'nama': kecamatan['nama'],
+                'provinsi': province['nama'], 'kota': kota['nama'],
+            }))
+        # kecamatan dilisting ulang setiap run, sama seperti crawl biasa
+        total = self.queue.put(items, reopen=True)
+        log.info("[QUEUE] %d item dimasukkan ke antrean %s", total, self.queue.path, extra={'event': 'queue_expand', 'items': total})
+        return total
+
+    def collect(self) -> int:
+        """Proses hasil yang dilaporkan worker; kembalikan jumlah item yang diproses."""
+        items = self.queue.collect()
+        for item in items:
+            data = item['data']
+            target = self.targets_by_key.get(data.get('run'))
+            if target is None:
+                # item run lain yang masuk setelah drop_stale (coordinator lain di file yang sama)
+                log.warning("[QUEUE] Item %s bukan milik target run ini, dibuang.", item['id'],
+                            extra={'event': 'queue_stale', 'item': item['id']})
+                continue
+            if item['kind'] == 'kecamatan':
+                self.collect_listing(data, target, item)
+                continue
+            payload = (target, data['sekolah'], data['provinsi'], data['kota'], data['kecamatan'])
+            if item['status'] == 'done':
+                self.save_result(payload, item['result'])
+            else:
+                log.error("      ☠️ MENYERAH: %s setelah %d percobaan, dicatat ke %s", data['nama'], item['attempts'],
+                          target.dead_letter_file,
+                          extra={'event': 'school_failed', 'sekolah_id': data['sekolah_id_enkrip'], 'error': item['error']})
+                self.progress.add('failed')
+                self.journal_for(target).mark_failed(data['sekolah_id_enkrip'], item['error'])
+                append_dead_letter(target.dead_letter_file, *payload[1:], item['error'], item['attempts'])
+        if items:
+            self.queue.mark_collected([item['id'] for item in items])
+        return len(items)
+
+    def collect_listing(self, data: dict, target, item: dict):
+        log.info("    Kecamatan: %s", data['nama'], extra={'event': 'kecamatan', 'kecamatan': data['nama'], 'kota': data['kota'],
+                                                          'semester_id': data['semester_id']})
+        if item['status'] != 'done' or not item['result']:
+            log.warning("    ❌ GAGAL mengambil daftar sekolah (%s). Melanjutkan.", item['error'])
+            return
+        schools = []
+        self.planned_requests += 1
+        for sekolah in item['result']:
+            if not target.accepts(sekolah):
+                continue
+            if self.over_budget():
+                break
+            payload = (target, sekolah, data['provinsi'], data['kota'], data['nama'])
+            if self.admit(payload):
+                self.planned_requests += self.requests_per_school
+                schools.append(self.school_item(payload))
+        if schools:
+            self.queue.put(schools, reopen=True)
+        elif self.detail_sources:
+            log.info("    Tidak ada sekolah baru yang perlu diambil di kecamatan ini.")
+
+    def run(self):
+        self.queue.set_finished(False)
+        self.progress.start()
+        for _ in self.semester_passes():
+            self.expand()
+            self.drain()
+        # worker berhenti setelah melihat tanda ini
+        self.queue.set_finished(True)
+        self.finish()
+
+    def drain(self):
+        """Kumpulkan hasil worker sampai tidak ada item yang pending, disewa atau belum diproses."""
+        last_progress = 0.0
+        while True:
+            collected = self.collect()
+            self.queue.requeue_expired()
+            counts = self.queue.counts()
+            if not collected and counts['pending'] + counts['leased'] + counts['uncollected'] == 0:
+                break
+            if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                log.info("[QUEUE] pending %d, leased %d, done %d, failed %d", counts['pending'], counts['leased'],
+                         counts['done'], counts['failed'], extra={'event': 'queue_status', **counts})
+            if not collected:
+                time.sleep(POLL_INTERVAL)
+
+
+def coordinate(targets, queue_path: str = QUEUE_FILE, listen: str = None, secret: str = None, **kwargs):
+    """Titik masuk `python -m dapodik coordinator`."""
+    ensure_logging()
+    queue = SqliteWorkQueue(queue_path)
+    server = None
+    if listen:
+        server = QueueServer(queue, parse_address(listen, default_host='0.0.0.0'), secret=secret)
+        server.start()
+    try:
+        coordinator = Coordinator(targets, queue, **kwargs)
+        coordinator.run()
+    finally:
+        if server is not None:
+            # beri waktu worker membaca tanda selesai sebelum server ditutup
+            time.sleep(POLL_INTERVAL * 2)
+            server.shutdown()
+            server.server_close()
+    return coordinator